@@ -5,7 +5,6 @@ This module implements a parser that utilizes tree-sitter to analyze code files
 and extract structural information like functions, classes, and imports.
 """
 import os
-import uuid
 import logging
 import subprocess
 import tempfile
@@ -136,6 +135,10 @@ class TreeSitterParser:
         
         # Track processed nodes to avoid duplicates
         self._processed_nodes: Set[str] = set()
+        
+        # IDs of nodes and (source, target, type) of edges already in the current result
+        self._added_node_ids: Set[str] = set()
+        self._added_edges: Set[Tuple[str, str, str]] = set()
     
     def _load_parser_from_file(self) -> Parser:
         """
@@ -221,6 +224,8 @@ class TreeSitterParser:
             
             # Reset processed nodes for this file
             self._processed_nodes = set()
+            self._added_node_ids = set()
+            self._added_edges = set()
             
             # Process the AST and extract nodes and edges
             result = {
@@ -279,7 +284,7 @@ class TreeSitterParser:
                         
                         # Add edge from module to function
                         result['edges'].append({
-                            'id': f"contains:{self._generate_id()}",
+                            'id': self._edge_id('contains', module_id, func_id),
                             'source': module_id,
                             'target': func_id,
                             'type': 'contains'
@@ -304,7 +309,7 @@ class TreeSitterParser:
                         
                         # Add edge from module to class
                         result['edges'].append({
-                            'id': f"contains:{self._generate_id()}",
+                            'id': self._edge_id('contains', module_id, class_id),
                             'source': module_id,
                             'target': class_id,
                             'type': 'contains'
@@ -331,7 +336,7 @@ class TreeSitterParser:
                         
                         # Add edge from module to function
                         result['edges'].append({
-                            'id': f"contains:{self._generate_id()}",
+                            'id': self._edge_id('contains', module_id, func_id),
                             'source': module_id,
                             'target': func_id,
                             'type': 'contains'
@@ -356,7 +361,7 @@ class TreeSitterParser:
                         
                         # Add edge from module to class
                         result['edges'].append({
-                            'id': f"contains:{self._generate_id()}",
+                            'id': self._edge_id('contains', module_id, class_id),
                             'source': module_id,
                             'target': class_id,
                             'type': 'contains'
@@ -549,7 +554,7 @@ class TreeSitterParser:
             func_node = next((child for child in node.children if child.type in ('identifier', 'attribute')), None)
             if func_node:
                 func_name = self._get_node_text(func_node)
-                call_id = f"call:{self._generate_id()}"
+                call_id = f"call:{filepath}:{node.start_point[0]}:{node.start_point[1]}"
                 
                 # Add call node
                 self._add_node(
@@ -717,7 +722,7 @@ class TreeSitterParser:
             func_node = next((child for child in node.children if child.type in ('identifier', 'member_expression')), None)
             if func_node:
                 func_name = self._get_node_text(func_node)
-                call_id = f"call:{self._generate_id()}"
+                call_id = f"call:{filepath}:{node.start_point[0]}:{node.start_point[1]}"
                 
                 # Add call node
                 self._add_node(
@@ -811,9 +816,15 @@ class TreeSitterParser:
         
         return node_id
     
-    def _generate_id(self) -> str:
-        """Generate a unique ID."""
-        return str(uuid.uuid4())
+    @staticmethod
+    def _edge_id(edge_type: str, source_id: str, target_id: str) -> str:
+        """
+        Build the ID of an edge from its type and endpoints.
+        
+        Edges are unique per (source, target, type) within a parse result, so the
+        ID is deterministic and reparsing unchanged source gives identical results.
+        """
+        return f"{edge_type}:{source_id}:{target_id}"
     
     def _get_node_text(self, node: Any) -> str:
         """
@@ -877,8 +888,9 @@ class TreeSitterParser:
             end_point: The end position (row, column) in the source
         """
         # Check if this node already exists
-        if any(n['id'] == node_id for n in result['nodes']):
+        if node_id in self._added_node_ids:
             return
+        self._added_node_ids.add(node_id)
         
         # Add the node
         result['nodes'].append({
@@ -905,15 +917,14 @@ class TreeSitterParser:
             edge_type: The type of the edge (e.g., 'calls', 'imports')
         """
         # Check if this edge already exists
-        if any(
-            e['source'] == source_id and e['target'] == target_id and e['type'] == edge_type
-            for e in result['edges']
-        ):
+        edge_key = (source_id, target_id, edge_type)
+        if edge_key in self._added_edges:
             return
+        self._added_edges.add(edge_key)
         
         # Add the edge
         result['edges'].append({
-            'id': f"{edge_type}:{self._generate_id()}",
+            'id': self._edge_id(edge_type, source_id, target_id),
             'source': source_id,
             'target': target_id,
             'type': edge_type,
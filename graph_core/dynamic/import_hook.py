@@ -18,7 +18,7 @@ import queue
 import threading
 import time
 import hashlib
-import pickle
+import tempfile
 import re
 from typing import Dict, List, Optional, Set, Tuple, Any, Union, Pattern
 
@@ -217,7 +217,7 @@ class TransformationCache:
             A unique cache key
         """
         # Use filename and content hash to create a unique key
-        content_hash = hashlib.md5(source_code.encode('utf-8')).hexdigest()
+        content_hash = hashlib.sha256(source_code.encode('utf-8')).hexdigest()
         # Use the module name as part of the key to avoid collisions
         module_name = os.path.basename(filename).split('.')[0]
         return f"{module_name}_{content_hash}"
@@ -225,13 +225,17 @@ class TransformationCache:
     def get_cache_path(self, cache_key: str) -> str:
         """Get the path for a cached transformation.
         
+        Entries are sharded into subdirectories by the first two characters of
+        the content hash, so no single directory grows with the whole cache.
+        
         Args:
             cache_key: The cache key
             
         Returns:
             Path to the cache file
         """
-        return os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        content_hash = cache_key.rsplit('_', 1)[-1]
+        return os.path.join(self.cache_dir, content_hash[:2], f"{cache_key}.py")
     
     def get(self, filename: str, source_code: str) -> Optional[str]:
         """Get cached transformed code if available.
@@ -251,21 +255,22 @@ class TransformationCache:
             return self.memory_cache[cache_key]
         
         # Check disk cache
+        # Open the entry directly rather than checking for it first, saving a stat per lookup
         cache_path = self.get_cache_path(cache_key)
-        if os.path.exists(cache_path):
-            try:
-                with open(cache_path, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    
-                # Update memory cache
-                self.memory_cache[cache_key] = cached_data
-                
-                logger.debug(f"Disk cache hit for {filename}")
-                return cached_data
-            except Exception as e:
-                logger.warning(f"Error loading cache for {filename}: {e}")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached_data = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Error loading cache for {filename}: {e}")
+            return None
         
-        return None
+        # Update memory cache
+        self.memory_cache[cache_key] = cached_data
+        
+        logger.debug(f"Disk cache hit for {filename}")
+        return cached_data
     
     def put(self, filename: str, source_code: str, transformed_code: str) -> None:
         """Store transformed code in the cache.
@@ -282,12 +287,22 @@ class TransformationCache:
         
         # Update disk cache
         cache_path = self.get_cache_path(cache_key)
+        temp_path = None
         try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(transformed_code, f)
+            shard_dir = os.path.dirname(cache_path)
+            os.makedirs(shard_dir, exist_ok=True)
+            # Write to a temporary file and rename it, so a reader never sees a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=shard_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(transformed_code)
+            os.replace(temp_path, cache_path)
+            temp_path = None
             logger.debug(f"Cached transformation for {filename}")
         except Exception as e:
             logger.warning(f"Error caching transformation for {filename}: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
     
     def invalidate(self, filename: str) -> None:
         """Invalidate cache entries for a file.
@@ -304,14 +319,40 @@ class TransformationCache:
         """Clear all cached transformations."""
         self.memory_cache.clear()
         
-        # Remove all files in the cache directory
-        for file in os.listdir(self.cache_dir):
-            file_path = os.path.join(self.cache_dir, file)
-            try:
-                if os.path.isfile(file_path) and file.endswith('.pkl'):
+        # Remove the entries in each shard, and pickled entries left by older versions
+        for entry in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, entry)
+            if os.path.isdir(entry_path) and len(entry) == 2:
+                file_paths = [os.path.join(entry_path, file) for file in os.listdir(entry_path) if file.endswith('.py')]
+            elif entry.endswith('.pkl'):
+                file_paths = [entry_path]
+            else:
+                continue
+            for file_path in file_paths:
+                try:
                     os.unlink(file_path)
-            except Exception as e:
-                logger.warning(f"Error removing cache file {file_path}: {e}")
+                except Exception as e:
+                    logger.warning(f"Error removing cache file {file_path}: {e}")
+
+
+def _combine_patterns(patterns: List[Pattern]) -> Optional[Pattern]:
+    """Combine compiled regex patterns into a single alternation.
+    
+    Args:
+        patterns: Compiled patterns to combine
+    
+    Returns:
+        A pattern that matches wherever any of the given patterns matches, or
+        None if there are no patterns or they cannot be joined into one regex
+        (for example, because they use global inline flags, or capturing groups
+        whose numbered backreferences would shift in the alternation)
+    """
+    if not patterns or any(p.groups for p in patterns):
+        return None
+    try:
+        return re.compile('|'.join(f'(?:{p.pattern})' for p in patterns))
+    except re.error:
+        return None
 
 
 class PythonInstrumenter:
@@ -335,6 +376,9 @@ class PythonInstrumenter:
         # Compile regex patterns for module filtering
         self.exclude_patterns = [re.compile(p) for p in exclude_patterns] if exclude_patterns else []
         self.include_patterns = [re.compile(p) for p in include_patterns] if include_patterns else []
+        # Each list is also matched as one alternation, so a path is scanned once per list
+        self._exclude_regex = _combine_patterns(self.exclude_patterns)
+        self._include_regex = _combine_patterns(self.include_patterns)
         
         # Initialize the transformation cache
         self.cache = TransformationCache(cache_dir)
@@ -370,21 +414,26 @@ class PythonInstrumenter:
             module_path = module_path[:-3]  # Remove .py extension
         
         # Skip if the module matches any exclude pattern
-        for pattern in self.exclude_patterns:
-            if pattern.search(module_path) or pattern.search(abs_path):
-                logger.debug(f"Skipping {filename} (matches exclude pattern)")
-                return False
+        if self._matches_any(self.exclude_patterns, self._exclude_regex, module_path, abs_path):
+            logger.debug(f"Skipping {filename} (matches exclude pattern)")
+            return False
         
         # If include patterns exist, only instrument if the module matches one
         if self.include_patterns:
-            for pattern in self.include_patterns:
-                if pattern.search(module_path) or pattern.search(abs_path):
-                    return True
+            if self._matches_any(self.include_patterns, self._include_regex, module_path, abs_path):
+                return True
             logger.debug(f"Skipping {filename} (doesn't match any include pattern)")
             return False
         
         return True
     
+    @staticmethod
+    def _matches_any(patterns: List[Pattern], combined: Optional[Pattern], module_path: str, abs_path: str) -> bool:
+        """Check whether the module path or absolute path matches any of the patterns."""
+        if combined is not None:
+            return bool(combined.search(module_path) or combined.search(abs_path))
+        return any(pattern.search(module_path) or pattern.search(abs_path) for pattern in patterns)
+    
     def instrument_code(self, source_code: str, module_name: str, filename: str) -> str:
         """Instrument Python source code.
         
@@ -640,6 +689,22 @@ def initialize_hook(
     return finder
 
 
+def drain_call_queue() -> List[FunctionCallEvent]:
+    """Remove and return all function call events from the queue.
+    
+    The queue's buffer is emptied under a single acquisition of its mutex
+    instead of taking the lock once per event.
+    
+    Returns:
+        List of function call events, oldest first
+    """
+    with function_call_queue.mutex:
+        events = list(function_call_queue.queue)
+        function_call_queue.queue.clear()
+        function_call_queue.not_full.notify_all()
+    return events
+
+
 def get_function_calls(timeout: Optional[float] = 0.1) -> List[FunctionCallEvent]:
     """Get all function call events from the queue.
     
@@ -649,15 +714,7 @@ def get_function_calls(timeout: Optional[float] = 0.1) -> List[FunctionCallEvent
     Returns:
         List of function call events
     """
-    events = []
-    try:
-        while True:
-            event = function_call_queue.get(block=False)
-            events.append(event)
-    except queue.Empty:
-        pass
-    
-    return events
+    return drain_call_queue()
 
 
 def get_monitored_files() -> Set[str]:
@@ -672,11 +729,7 @@ def get_monitored_files() -> Set[str]:
 
 def clear_call_queue() -> None:
     """Clear the function call queue."""
-    try:
-        while True:
-            function_call_queue.get(block=False)
-    except queue.Empty:
-        pass
+    drain_call_queue()
 
 
 def clear_transformation_cache(cache_dir: Optional[str] = None) -> None:
@@ -6,15 +6,21 @@ the dependency graph updated accordingly.
 """
 
 import os
+import sys
+import json
+import hashlib
 import logging
+import tempfile
 import threading
 import time
-from typing import List, Optional, Dict, Any, Callable, Set, Tuple, Union, Literal
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Callable, Iterator, Set, Tuple, Union, Literal
 from collections import deque
 
 from graph_core.analyzer import get_parser_for_file
 from graph_core.storage.in_memory import InMemoryGraphStorage
-from graph_core.storage.json_storage import JSONGraphStorage, calculate_content_hash
+from graph_core.storage.json_storage import JSONGraphStorage, calculate_file_hash
 from graph_core.dynamic.import_hook import initialize_hook, get_function_calls, FunctionCallEvent
 from graph_core.watchers.rename_detection import detect_renames, RenameEvent, match_functions
 from graph_core.security.secret_scanner import scan_file_for_secrets
@@ -36,15 +42,21 @@ class DependencyGraphManager:
     """
     
     # Supported file extensions
-    SUPPORTED_EXTENSIONS = ['.py', '.js', '.ts', '.tsx']
+    SUPPORTED_EXTENSIONS = ('.py', '.js', '.ts', '.tsx')
     
     # How long (in seconds) to keep track of deleted files for rename detection
     RENAME_DETECTION_WINDOW = 2.0
+    
+    # Files modified more recently than this (in seconds) when hashed are not memoized,
+    # since a second write within the filesystem's timestamp granularity keeps the same mtime
+    HASH_MEMO_RACY_WINDOW = 2.0
 
     def __init__(self, 
                  storage: Optional[Union[InMemoryGraphStorage, JSONGraphStorage]] = None,
                  storage_type: Literal["memory", "json"] = "memory",
-                 json_path: str = DEFAULT_JSON_PATH):
+                 json_path: str = DEFAULT_JSON_PATH,
+                 thread_factory: Callable[..., threading.Thread] = threading.Thread,
+                 hash_cache_path: Optional[str] = None):
         """
         Initialize the dependency graph manager.
         
@@ -55,6 +67,10 @@ class DependencyGraphManager:
                 "memory" for in-memory storage, "json" for JSON file storage.
             json_path: Path to the JSON file when using JSONGraphStorage.
                 Only used if storage_type is "json" and storage is not provided.
+            thread_factory: Callable used to create the instrumentation thread,
+                called with the same arguments as threading.Thread.
+            hash_cache_path: Optional path of a JSON file that persists content hashes,
+                keyed by each file's (mtime, size) signature, across restarts.
         """
         # Create the storage if not provided
         if storage is None:
@@ -79,6 +95,8 @@ class DependencyGraphManager:
         self.dynamic_event_handlers = []
         
         # Python instrumentation
+        self._thread_factory = thread_factory
+        self._stop_event = threading.Event()  # Wakes the polling thread as soon as instrumentation stops
         self.instrumentation_active = False
         self.instrumentation_thread = None
         self.instrumentation_watch_dir = None
@@ -94,6 +112,18 @@ class DependencyGraphManager:
         
         # Keep track of renamed files for history
         self.rename_history = {}  # Maps new_path -> old_path
+        
+        # Last content hash computed per file, with the (mtime, size) signature it was computed at
+        self._hash_memo: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        
+        # Fingerprint of the parse result last stored for each file
+        self._parse_fingerprints: Dict[str, str] = {}
+        
+        # Parser for each lowercase file extension, created on first use (None if unavailable)
+        self._parser_by_suffix: Dict[str, Any] = {}
+        self.hash_cache_path = hash_cache_path
+        if hash_cache_path:
+            self._load_hash_cache()
     
     @classmethod
     def create_with_json_storage(cls, json_path: str = DEFAULT_JSON_PATH) -> 'DependencyGraphManager':
@@ -165,59 +195,47 @@ class DependencyGraphManager:
                     logger.warning(f"Source node {source_id} or target node {target_id} not found")
                     return False
                 
-                # Check if an edge already exists
-                existing_edges = self.storage.get_edges_for_nodes([source_id])
-                existing_edge = None
-                
-                for edge in existing_edges:
-                    if (edge['source'] == source_id and 
-                        edge['target'] == target_id and 
-                        edge['type'] == 'calls'):
-                        existing_edge = edge
-                        break
+                # Check if an edge already exists; edges are keyed by type, so this is a
+                # direct adjacency lookup rather than a scan of the source's edges
+                existing_edge = self.storage.graph.get_edge_data(source_id, target_id, key='calls')
                 
                 # Update the existing edge or add a new one
                 current_time = time.time()
                 
-                if existing_edge:
-                    # Update the existing edge
-                    edge_id = existing_edge['id']
-                    
+                if existing_edge is not None:
                     # Increment the call count
                     call_count = existing_edge.get('dynamic_call_count', 0) + 1
                     
-                    # Update the edge with networkx
-                    self.storage.graph[source_id][target_id]['dynamic_call_count'] = call_count
-                    self.storage.graph[source_id][target_id]['dynamic'] = True
-                    self.storage.graph[source_id][target_id]['last_call_time'] = current_time
+                    # Update the edge attributes in place
+                    existing_edge['dynamic_call_count'] = call_count
+                    existing_edge['dynamic'] = True
+                    existing_edge['last_call_time'] = current_time
                     
                     logger.debug(f"Updated dynamic edge: {source_id} -> {target_id}, calls: {call_count}")
                 else:
                     # Add a new edge
                     edge_data = {
                         'id': f"edge:{source_id}:{target_id}:calls",
-                        'source': source_id,
-                        'target': target_id,
-                        'type': 'calls',
                         'dynamic': True,
                         'dynamic_call_count': 1,
                         'first_call_time': current_time,
                         'last_call_time': current_time
                     }
                     
-                    # Add the edge to the graph
+                    # Add the edge to the graph, using the type as key like the storages do
                     self.storage.graph.add_edge(
                         source_id, 
                         target_id, 
+                        key='calls',
                         **edge_data
                     )
                     
                     logger.debug(f"Added dynamic edge: {source_id} -> {target_id}")
                 
-                # Save graph if using JSON storage
+                # Log the edge if using JSON storage (avoids rewriting the whole graph per call)
                 if self.is_json_storage:
-                    self.storage.save_graph()
-                    logger.debug(f"Graph saved to JSON after dynamic call event: {source_id} -> {target_id}")
+                    self.storage.log_edge_update(source_id, target_id, 'calls')
+                    logger.debug(f"Logged dynamic call event to JSON storage: {source_id} -> {target_id}")
                 
                 source_name = source_node.get('name', source_id)
                 target_name = target_node.get('name', target_id)
@@ -254,22 +272,17 @@ class DependencyGraphManager:
             function_id: ID of the function node
             increment: Amount to increment the call count by
         """
-        node = self.storage.get_node(function_id)
-        if node:
-            # Update dynamic call count attribute
-            if 'dynamic_call_count' in node:
-                node['dynamic_call_count'] += increment
-            else:
-                node['dynamic_call_count'] = increment
+        # Increment the attribute in place rather than copying the node out and back in;
+        # this runs once per traced call
+        attrs = self.storage.graph.nodes.get(function_id)
+        if attrs is not None:
+            call_count = attrs.get('dynamic_call_count', 0) + increment
+            attrs['dynamic_call_count'] = call_count
+            logger.debug(f"Updated call count for {function_id}: {call_count}")
             
-            # Update the node in storage
-            attrs = {k: v for k, v in node.items() if k != 'id'}
-            self.storage.graph.add_node(function_id, **attrs)
-            logger.debug(f"Updated call count for {function_id}: {node['dynamic_call_count']}")
-            
-            # Save the graph if using JSONGraphStorage
+            # Log the node if using JSONGraphStorage
             if self.is_json_storage:
-                self.storage.save_graph()
+                self.storage.log_node_update(function_id)
     
     def detect_renames(self) -> List[RenameEvent]:
         """
@@ -281,19 +294,15 @@ class DependencyGraphManager:
         Returns:
             A list of RenameEvent objects representing detected renames
         """
-        current_time = time.time()
+        # Buffers are appended in time order, so expired entries sit at the left end
+        cutoff = time.time() - self.RENAME_DETECTION_WINDOW
+        for buffer in (self.deleted_files, self.created_files):
+            while buffer and buffer[0][0] < cutoff:
+                buffer.popleft()
         
-        # Get recently deleted files that are still within the window
-        recent_deleted = [
-            filepath for timestamp, filepath in self.deleted_files
-            if current_time - timestamp <= self.RENAME_DETECTION_WINDOW
-        ]
-        
-        # Get recently created files that are still within the window
-        recent_created = [
-            filepath for timestamp, filepath in self.created_files
-            if current_time - timestamp <= self.RENAME_DETECTION_WINDOW
-        ]
+        # Everything left is within the window
+        recent_deleted = [filepath for _, filepath in self.deleted_files]
+        recent_created = [filepath for _, filepath in self.created_files]
         
         # If we have both deleted and created files, check for renames
         if recent_deleted and recent_created:
@@ -305,20 +314,19 @@ class DependencyGraphManager:
             if rename_events:
                 logger.info(f"Detected {len(rename_events)} file rename(s)")
                 
-                # Remove the files involved in renames from the buffers
+                # Update rename history
                 for event in rename_events:
-                    # Update rename history
                     self.rename_history[event.new_path] = event.old_path
-                    
-                    # Filter out the renamed files from our buffers
-                    self.deleted_files = deque(
-                        [(ts, path) for ts, path in self.deleted_files if path != event.old_path],
-                        maxlen=100
-                    )
-                    self.created_files = deque(
-                        [(ts, path) for ts, path in self.created_files if path != event.new_path],
-                        maxlen=100
-                    )
+                
+                # Filter the renamed files out of our buffers in one pass each
+                renamed_old = {event.old_path for event in rename_events}
+                renamed_new = {event.new_path for event in rename_events}
+                kept_deleted = [entry for entry in self.deleted_files if entry[1] not in renamed_old]
+                kept_created = [entry for entry in self.created_files if entry[1] not in renamed_new]
+                self.deleted_files.clear()
+                self.deleted_files.extend(kept_deleted)
+                self.created_files.clear()
+                self.created_files.extend(kept_created)
             
             return rename_events
         
@@ -369,8 +377,9 @@ class DependencyGraphManager:
         )
         
         # Start the event processing thread
+        self._stop_event.clear()
         self.instrumentation_active = True
-        self.instrumentation_thread = threading.Thread(
+        self.instrumentation_thread = self._thread_factory(
             target=self._process_function_call_events,
             daemon=True
         )
@@ -389,8 +398,9 @@ class DependencyGraphManager:
             logger.warning("Python instrumentation is not active")
             return
         
-        # Stop the event processing thread
+        # Stop the event processing thread, waking it if it is waiting for the next poll
         self.instrumentation_active = False
+        self._stop_event.set()
         if self.instrumentation_thread and self.instrumentation_thread.is_alive():
             self.instrumentation_thread.join(timeout=2.0)
         
@@ -413,11 +423,13 @@ class DependencyGraphManager:
                 # Process each event if there are any
                 if events:
                     logger.debug(f"Processing {len(events)} function call events")
-                    for event in events:
-                        self._process_function_call_event(event)
+                    # Persist each touched node/edge once per poll rather than once per call
+                    with self.batched():
+                        for event in events:
+                            self._process_function_call_event(event)
                 
-                # Sleep for the poll interval
-                time.sleep(self.instrumentation_poll_interval)
+                # Wait for the poll interval, returning early if instrumentation is stopped
+                self._stop_event.wait(self.instrumentation_poll_interval)
             except Exception as e:
                 logger.error(f"Error processing function call events: {str(e)}", exc_info=True)
         
@@ -491,9 +503,16 @@ class DependencyGraphManager:
             logger.warning(f"No nodes found for file {old_path}")
             return False
         
+        # Move the file's node set in one step; merge if the new path is already tracked
+        node_ids = self.storage.file_nodes.pop(old_path)
+        if new_path in self.storage.file_nodes:
+            self.storage.file_nodes[new_path].update(node_ids)
+        else:
+            self.storage.file_nodes[new_path] = node_ids
+        
         # Update the filepath for each node
         updated = False
-        for node_id in self.storage.file_nodes.get(old_path, set()):
+        for node_id in node_ids:
             node = self.storage.get_node(node_id)
             if node:
                 # Update filepath and add rename history
@@ -502,25 +521,29 @@ class DependencyGraphManager:
                     node['rename_history'] = []
                 node['rename_history'].append(old_path)
                 
+                # Keep the node's reverse file pointers in step with file_nodes
+                if 'files' in node:
+                    node['files'] = list(dict.fromkeys(new_path if f == old_path else f for f in node['files']))
+                
                 # Update the node in storage
                 attrs = {k: v for k, v in node.items() if k != 'id'}
                 self.storage.graph.add_node(node_id, **attrs)
                 updated = True
         
-        # Update file_nodes tracking
-        if old_path in self.storage.file_nodes:
-            nodes = self.storage.file_nodes[old_path]
-            self.storage.file_nodes[new_path] = nodes
-            del self.storage.file_nodes[old_path]
+        # The moved nodes now carry the new path, so the old fingerprint no longer describes them
+        self._parse_fingerprints.pop(old_path, None)
+        self._parse_fingerprints.pop(new_path, None)
         
         # Record the rename in the history
         if updated:
             self.rename_history[new_path] = old_path
             logger.info(f"Updated filepath for nodes from {old_path} to {new_path}")
             
-            # Save the graph if using JSONGraphStorage
+            # Append the rename to the JSON log instead of rewriting the whole graph
             if self.is_json_storage:
-                self.storage.save_graph()
+                self.storage.log_file_rename(old_path, new_path)
+                for node_id in node_ids:
+                    self.storage.log_node_update(node_id)
         
         return updated
     
@@ -551,18 +574,23 @@ class DependencyGraphManager:
             # Track which functions were successfully updated
             updated_functions = {}
             
+            # Index the AST nodes by ID once instead of scanning them for every match
+            old_nodes_by_id = {node.get('id'): node for node in old_ast.get('nodes', [])}
+            new_nodes_by_id = {node.get('id'): node for node in new_ast.get('nodes', [])}
+            
             # Process each matched function
             for old_id, new_id in function_matches.items():
                 # Get the nodes from old and new ASTs
-                old_func = next((node for node in old_ast.get('nodes', []) if node.get('id') == old_id), None)
-                new_func = next((node for node in new_ast.get('nodes', []) if node.get('id') == new_id), None)
+                old_func = old_nodes_by_id.get(old_id)
+                new_func = new_nodes_by_id.get(new_id)
                 
                 if not old_func or not new_func:
                     continue
                 
-                # Get the old node from storage
-                node = self.storage.get_node(old_id)
-                if not node:
+                # Look the node up in the graph and update its attributes in place,
+                # rather than copying it out and writing it back with add_node
+                node = self.storage.graph.nodes.get(old_id)
+                if node is None:
                     continue
                 
                 old_name = node.get('name', '')
@@ -571,22 +599,14 @@ class DependencyGraphManager:
                 # Update the node's name and other relevant properties
                 node['name'] = new_name
                 
-                # Create a rename history if it doesn't exist
-                if 'rename_history' not in node:
-                    node['rename_history'] = []
-                
-                # Add the old name to the rename history
-                node['rename_history'].append(old_name)
+                # Add the old name to the rename history, creating it if needed
+                node.setdefault('rename_history', []).append(old_name)
                 
                 # Update any other properties that might have changed
                 for key in ['parameters', 'body', 'start_point', 'end_point']:
                     if key in new_func:
                         node[key] = new_func[key]
                 
-                # Update the node in storage
-                attrs = {k: v for k, v in node.items() if k != 'id'}
-                self.storage.graph.add_node(old_id, **attrs)
-                
                 # Record the update
                 updated_functions[old_id] = new_id
                 logger.info(f"Updated function name: {old_name} -> {new_name} (id: {old_id})")
@@ -601,19 +621,130 @@ class DependencyGraphManager:
             logger.error(f"Error updating function names: {str(e)}", exc_info=True)
             return {}
     
-    def _handle_file_created(self, filepath: str) -> None:
+    def _is_supported_file(self, filepath: str) -> bool:
+        """Check whether the file has one of the supported extensions (case-insensitive)."""
+        return filepath.lower().endswith(self.SUPPORTED_EXTENSIONS)
+    
+    @staticmethod
+    def _parse_fingerprint(parse_result: Dict[str, List[Dict[str, Any]]]) -> str:
+        """Compute a stable fingerprint of a parse result's nodes and edges."""
+        encoded = json.dumps(parse_result, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+    
+    def _update_stored_content_hash(self, filepath: str, content_hash: str) -> None:
+        """Set the content hash on a file's module node without rebuilding its nodes and edges."""
+        for node_id in self.storage.file_nodes.get(filepath, ()):
+            attrs = self.storage.graph.nodes.get(node_id)
+            if attrs is not None and attrs.get('type') == 'module' and attrs.get('filepath') == filepath:
+                attrs['content_hash'] = content_hash
+                if self.is_json_storage:
+                    self.storage.log_node_update(node_id)
+                return
+    
+    def _get_parser(self, filepath: str) -> Optional[Any]:
+        """Get the parser for a file, reusing the one created for its extension."""
+        suffix = os.path.splitext(filepath)[1].lower()
+        try:
+            return self._parser_by_suffix[suffix]
+        except KeyError:
+            parser = self._parser_by_suffix[suffix] = get_parser_for_file(filepath)
+            return parser
+    
+    def _file_content_hash(self, filepath: str, stat: Optional[os.stat_result] = None) -> str:
+        """
+        Hash the file's content, reusing the last hash if its mtime and size haven't changed.
+        
+        Args:
+            filepath: Path to the file to hash
+            stat: The file's stat result, if already known (e.g. from os.scandir)
+            
+        Returns:
+            The content hash of the file
+        """
+        try:
+            if stat is None:
+                stat = os.stat(filepath)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        
+        cached = self._hash_memo.get(filepath)
+        if signature is not None and cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        with open(filepath, 'rb', buffering=0) as f:
+            content_hash = calculate_file_hash(f)
+        
+        if signature is not None and time.time_ns() - signature[0] > self.HASH_MEMO_RACY_WINDOW * 1e9:
+            self._hash_memo[filepath] = (signature, content_hash)
+        else:
+            self._hash_memo.pop(filepath, None)
+        return content_hash
+    
+    def _load_hash_cache(self) -> None:
+        """Load memoized content hashes from the hash cache file, if it exists."""
+        try:
+            with open(self.hash_cache_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            self._hash_memo = {
+                filepath: ((mtime_ns, size), content_hash)
+                for filepath, (mtime_ns, size, content_hash) in entries.items()
+            }
+            logger.info(f"Loaded {len(self._hash_memo)} cached content hashes from {self.hash_cache_path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable hash cache {self.hash_cache_path}: {str(e)}")
+    
+    def save_hash_cache(self) -> bool:
+        """
+        Write the memoized content hashes to the hash cache file.
+        
+        Returns:
+            bool: True if the cache was written, False if no cache path is set or writing failed
+        """
+        if not self.hash_cache_path:
+            return False
+        
+        entries = {
+            filepath: [mtime_ns, size, content_hash]
+            for filepath, ((mtime_ns, size), content_hash) in list(self._hash_memo.items())
+        }
+        temp_file = None
+        try:
+            cache_dir = os.path.dirname(os.path.abspath(self.hash_cache_path))
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            # Replace the old cache in one step so a crash never leaves it half-written
+            os.replace(temp_file, self.hash_cache_path)
+            temp_file = None
+            return True
+        except OSError as e:
+            logger.error(f"Error saving hash cache to {self.hash_cache_path}: {str(e)}")
+            return False
+        finally:
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+    
+    def _prehash_file(self, filepath: str, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """Compute a file's content hash ahead of its event, or None if it cannot be read."""
+        try:
+            return self._file_content_hash(filepath, stat)
+        except OSError:
+            return None
+    
+    def _handle_file_created(self, filepath: str, content_hash: Optional[str] = None) -> None:
         """
         Handle 'created' file event.
         
         Args:
             filepath: Path to the file that was created
+            content_hash: Hash of the file content, if already computed
         """
-        # Get file extension
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-        
         # Only process supported file types
-        if ext not in self.SUPPORTED_EXTENSIONS:
+        if not self._is_supported_file(filepath):
             # logger.debug(f"Ignoring unsupported file type: {filepath}")
             return
             
@@ -637,12 +768,17 @@ class DependencyGraphManager:
         if not renamed:
             try:
                 # Calculate hash
-                with open(filepath, 'rb') as f:
-                    content = f.read()
-                content_hash = calculate_content_hash(content)
+                if content_hash is None:
+                    content_hash = self._file_content_hash(filepath)
+
+                # Watchers can report the same creation more than once; skip the re-parse
+                # if the stored graph already reflects this content
+                if self.storage.get_file_content_hash(filepath) == content_hash:
+                    logger.info(f"File content unchanged, skipping re-parse for: {filepath}")
+                    return
 
                 # Get the appropriate parser
-                parser = get_parser_for_file(filepath)
+                parser = self._get_parser(filepath)
                 if parser is None:
                     logger.warning(f"No parser available for {filepath}")
                     return
@@ -656,6 +792,7 @@ class DependencyGraphManager:
                 
                 # Update the storage, including the hash
                 self.storage.add_or_update_file(filepath, parse_result, content_hash=content_hash)
+                self._parse_fingerprints[filepath] = self._parse_fingerprint(parse_result)
                 logger.info(f"Updated graph for created file: {filepath}")
 
             except FileNotFoundError:
@@ -670,20 +807,14 @@ class DependencyGraphManager:
         Args:
             filepath: Path to the file that was modified
         """
-        # Get file extension
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-
         # Only process supported file types
-        if ext not in self.SUPPORTED_EXTENSIONS:
+        if not self._is_supported_file(filepath):
             # logger.debug(f"Ignoring unsupported file type: {filepath}")
             return
 
         try:
             # Calculate hash of the current file content
-            with open(filepath, 'rb') as f:
-                current_content = f.read()
-            current_hash = calculate_content_hash(current_content)
+            current_hash = self._file_content_hash(filepath)
 
             # Get the previously stored hash
             stored_hash = self.storage.get_file_content_hash(filepath)
@@ -695,7 +826,7 @@ class DependencyGraphManager:
 
             logger.info(f"File content changed (or no hash found), processing: {filepath}")
             # Get the appropriate parser
-            parser = get_parser_for_file(filepath)
+            parser = self._get_parser(filepath)
             if parser is None:
                 logger.warning(f"No parser available for {filepath}")
                 return
@@ -703,16 +834,13 @@ class DependencyGraphManager:
             # Parse the file
             new_ast = parser.parse_file(filepath)
 
-            # Get the original AST for this file (needed for rename detection)
+            # Get the original AST for this file (needed for rename detection).
+            # Rename matching only compares nodes, so the old edges are not looked up.
+            old_node_ids = self.storage.file_nodes.get(filepath, set())
             old_ast = {
-                'nodes': [],
+                'nodes': [node for node in map(self.storage.get_node, old_node_ids) if node],
                 'edges': []
             }
-            old_node_ids = self.storage.file_nodes.get(filepath, set())
-            old_nodes = [self.storage.get_node(node_id) for node_id in old_node_ids if self.storage.get_node(node_id)]
-            old_ast['nodes'] = old_nodes
-            if old_nodes:
-                old_ast['edges'] = self.storage.get_edges_for_nodes(old_node_ids)
 
             # Check for renamed functions BEFORE modifying new_ast
             renamed_functions = self.update_function_names(old_ast, new_ast)
@@ -730,8 +858,17 @@ class DependencyGraphManager:
             original_new_ast = new_ast.copy() if new_ast else None
             new_ast = scan_parse_result_for_secrets(new_ast, filepath)
             
+            # If the edit didn't change the parse result (e.g. whitespace or comments), keep the
+            # stored nodes and edges and only record the new content hash
+            fingerprint = self._parse_fingerprint(new_ast)
+            if self._parse_fingerprints.get(filepath) == fingerprint:
+                self._update_stored_content_hash(filepath, current_hash)
+                logger.info(f"Parse result unchanged, skipping graph update for: {filepath}")
+                return
+            
             # Update the storage, passing the new hash
             self.storage.add_or_update_file(filepath, new_ast, content_hash=current_hash)
+            self._parse_fingerprints[filepath] = fingerprint
             logger.info(f"Updated graph for modified file: {filepath}")
 
         except FileNotFoundError:
@@ -746,17 +883,15 @@ class DependencyGraphManager:
         Args:
             filepath: Path to the file that was deleted
         """
-        # Get file extension
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-        
         # Only process supported file types
-        if ext not in self.SUPPORTED_EXTENSIONS:
+        if not self._is_supported_file(filepath):
             logger.debug(f"Ignoring unsupported file type: {filepath}")
             return
             
         # Add to deleted files buffer for rename detection
         self.deleted_files.append((time.time(), filepath))
+        self._hash_memo.pop(filepath, None)
+        self._parse_fingerprints.pop(filepath, None)
         
         # Check for renames
         rename_events = self.detect_renames()
@@ -780,27 +915,27 @@ class DependencyGraphManager:
         Args:
             event_type: The type of event ('created', 'modified', 'deleted')
             filepath: The path to the file that triggered the event
-            extra_info: Additional information about the event (optional)
+            extra_info: Additional information about the event (optional).
+                For 'created' events, a precomputed "content_hash" is used instead of rehashing.
         """
         try:
             extra_info = extra_info or {}
-            if event_type == 'created':
-                self._handle_file_created(filepath)
-            elif event_type == 'modified':
-                self._handle_file_modified(filepath)
-            elif event_type == 'deleted':
-                self._handle_file_deleted(filepath)
-            elif event_type == 'renamed':
-                old_path = filepath
-                new_path = extra_info.get("dest_path", "")
-                self.update_node_filepath(old_path, new_path)
-            else:
-                logging.warning(f"Unknown event type: {event_type} for file {filepath}")
-                
-            # Save graph if using JSON storage
-            if self.is_json_storage:
-                self.storage.save_graph()
-                logging.debug(f"Graph saved to JSON after {event_type} event for {filepath}")
+            # Every node and buffer entry for the file then shares one path string
+            filepath = sys.intern(os.fspath(filepath))
+            # Storage updates made while handling the event are written to JSON once, on exit
+            with self.batched():
+                if event_type == 'created':
+                    self._handle_file_created(filepath, content_hash=extra_info.get("content_hash"))
+                elif event_type == 'modified':
+                    self._handle_file_modified(filepath)
+                elif event_type == 'deleted':
+                    self._handle_file_deleted(filepath)
+                elif event_type == 'renamed':
+                    old_path = filepath
+                    new_path = extra_info.get("dest_path", "")
+                    self.update_node_filepath(old_path, new_path)
+                else:
+                    logging.warning(f"Unknown event type: {event_type} for file {filepath}")
                 
         except Exception as e:
             logging.error(f"Error handling {event_type} event for {filepath}: {str(e)}")
@@ -808,6 +943,63 @@ class DependencyGraphManager:
             logging.error(traceback.format_exc())
             self._save_graph_if_json()
     
+    def on_file_events_bulk(self, event_type: str, filepaths: List[str],
+                            stats: Optional[List[Optional[os.stat_result]]] = None) -> None:
+        """
+        Handle a group of file events of the same type.
+        
+        The JSON graph is written once for the whole group, and for 'created'
+        events the files are hashed on a thread pool before they are processed.
+        
+        Args:
+            event_type: The type of the events ('created', 'modified', 'deleted')
+            filepaths: The paths of the files that triggered the events
+            stats: Stat results for the files, in the same order, if already known
+                (e.g. from os.scandir); reused when hashing 'created' files
+        """
+        if event_type == 'created' and len(filepaths) > 1:
+            stats = stats if stats is not None else [None] * len(filepaths)
+            # Reading and hashing release the GIL; parsing and storage updates stay on this thread
+            with ThreadPoolExecutor() as executor:
+                extra_infos = [{"content_hash": h} for h in executor.map(self._prehash_file, filepaths, stats)]
+        else:
+            extra_infos = [None] * len(filepaths)
+        
+        # Write the JSON graph once for the whole group instead of once per file
+        with self.batched():
+            for filepath, extra_info in zip(filepaths, extra_infos):
+                self.on_file_event(event_type, filepath, extra_info)
+    
+    def _scan_supported_files(self, directory: str) -> Iterator[os.DirEntry]:
+        """
+        Yield the directory entries of all supported files under a directory.
+        
+        Args:
+            directory: Directory to scan recursively; symlinked directories are not followed
+            
+        Directories that cannot be read (e.g. permission denied, or removed during
+        the scan) are logged and skipped, like os.walk does.
+        """
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                entries = os.scandir(current)
+            except OSError as e:
+                logger.warning(f"Skipping unreadable directory {current}: {str(e)}")
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError as e:
+                        logger.warning(f"Skipping entry {entry.path}: {str(e)}")
+                        continue
+                    if is_dir:
+                        pending.append(entry.path)
+                    elif self._is_supported_file(entry.name):
+                        yield entry
+    
     def process_existing_files(self, directory: str) -> int:
         """
         Process all existing supported files in a directory.
@@ -827,17 +1019,21 @@ class DependencyGraphManager:
         if not os.path.isdir(directory):
             raise ValueError(f"Not a directory: {directory}")
         
-        count = 0
-        for root, _, files in os.walk(directory):
-            for file in files:
-                _, ext = os.path.splitext(file)
-                if ext.lower() in self.SUPPORTED_EXTENSIONS:
-                    filepath = os.path.join(root, file)
-                    try:
-                        self.on_file_event('created', filepath)
-                        count += 1
-                    except Exception as e:
-                        logger.error(f"Error processing file {filepath}: {str(e)}")
+        filepaths = []
+        stats = []
+        for entry in self._scan_supported_files(directory):
+            filepaths.append(entry.path)
+            try:
+                # On Windows the directory listing already carries this; elsewhere it is
+                # the one stat call the hash memo needs anyway
+                stats.append(entry.stat())
+            except OSError as e:
+                logger.warning(f"Could not stat {entry.path}: {str(e)}")
+                stats.append(None)
+        
+        self.on_file_events_bulk('created', filepaths, stats)
+        count = len(filepaths)
+        self.save_hash_cache()
         
         logger.info(f"Processed {count} existing files in {directory}")
         return count
@@ -876,41 +1072,12 @@ class DependencyGraphManager:
             # Create a new JSON storage
             json_storage = JSONGraphStorage(json_path)
             
-            # Get all nodes and edges from current storage
-            all_nodes = self.storage.get_all_nodes()
-            all_edges = self.storage.get_all_edges()
-            
-            # Add all nodes to the new storage
-            for node in all_nodes:
-                # Ensure any attributes that might be sets are converted to lists
-                for key, value in node.items():
-                    if isinstance(value, set):
-                        node[key] = list(value)
-                json_storage.graph.add_node(node['id'], **{k: v for k, v in node.items() if k != 'id'})
-            
-            # Add all edges to the new storage
-            for source, target, key, data in self.storage.graph.edges(data=True, keys=True):
-                try:
-                    # Ensure source, target, and key are not duplicated in **data
-                    edge_copy = data.copy()
-                    edge_copy.pop('source', None)
-                    edge_copy.pop('target', None)
-                    edge_copy.pop('key', None)
-
-                    json_storage.graph.add_edge(
-                        source,
-                        target,
-                        key=key,
-                        **edge_copy # Spread remaining attributes
-                    )
-                except Exception as e:
-                    logging.error(f"Failed to add edge during migration: ({source}, {target}, {key}) - {e}")
-                    # Optionally continue or raise depending on desired robustness
-
-            # Copy file_nodes mapping using lists instead of sets
-            json_storage.file_nodes = {}
-            for filepath, node_ids in self.storage.file_nodes.items():
-                json_storage.file_nodes[filepath] = list(node_ids)
+            # Copy the whole graph in one bulk operation rather than node by node
+            json_storage.graph = self.storage.graph.copy()
+            json_storage.file_nodes = {
+                filepath: set(node_ids)
+                for filepath, node_ids in self.storage.file_nodes.items()
+            }
             
             # Save the migrated graph to the JSON file
             if not json_storage.save_graph():
@@ -919,6 +1086,7 @@ class DependencyGraphManager:
 
             # Switch the manager's storage to the new JSON storage
             self.storage = json_storage
+            self.is_json_storage = True
             logging.info(f"Successfully migrated graph to JSON storage at {json_path}")
             return True
             
@@ -942,6 +1110,30 @@ class DependencyGraphManager:
             logger.error(f"Error getting graph changes: {str(e)}")
             return None, None
 
+    @contextmanager
+    def batched(self):
+        """
+        Group graph updates so that JSON storage is written at most once.
+        
+        Saves requested inside the block are deferred until it exits. Has no
+        effect with in-memory storage.
+        """
+        if self.is_json_storage:
+            with self.storage.batched():
+                yield self
+        else:
+            yield self
+
+    def flush(self) -> None:
+        """
+        Write the current graph to disk if using JSON storage, waiting for any background write.
+        
+        The hash cache is also written, if one is configured.
+        """
+        if self.is_json_storage:
+            self.storage.flush()
+        self.save_hash_cache()
+
     def _save_graph_if_json(self) -> None:
         """Save the current graph to storage if using JSON storage."""
         if self.is_json_storage:
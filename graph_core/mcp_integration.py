@@ -163,20 +163,17 @@ class GraphEngineMCP:
         if not self.graph_manager.storage.get_node(node_id):
             return []
             
-        # Get all edges connected to this node
-        all_edges = self.graph_manager.storage.get_edges_for_nodes([node_id])
-        
-        if direction == "both":
-            return [self._convert_edge_to_dict(edge) for edge in all_edges]
-        
-        filtered_edges = []
-        for edge in all_edges:
-            if direction == "incoming" and edge['target'] == node_id:
-                filtered_edges.append(self._convert_edge_to_dict(edge))
-            elif direction == "outgoing" and edge['source'] == node_id:
-                filtered_edges.append(self._convert_edge_to_dict(edge))
-                
-        return filtered_edges
+        storage = self.graph_manager.storage
+        
+        # Read only the requested side of the node's adjacency
+        if direction == "incoming":
+            edges = storage.get_in_edges(node_id)
+        elif direction == "outgoing":
+            edges = storage.get_out_edges(node_id)
+        else:
+            edges = storage.get_edges_for_nodes([node_id])
+        
+        return [self._convert_edge_to_dict(edge) for edge in edges]
     
     def get_nodes_by_type(self, node_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
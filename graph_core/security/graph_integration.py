@@ -5,6 +5,7 @@ This module provides functionality to integrate the secret scanner with the depe
 """
 
 import logging
+from bisect import bisect_left, bisect_right
 from typing import Dict, Any, List, Union
 
 from graph_core.security.secret_scanner import SecretFinding, scan_file_for_secrets
@@ -132,6 +133,9 @@ def scan_parse_result_for_secrets(parse_result: Dict[str, List], filepath: str)
                 line_to_findings[finding.line_number] = []
             line_to_findings[finding.line_number].append(finding)
         
+        # Sorted finding lines, so each node can select its line range by binary search
+        finding_lines = sorted(line_to_findings)
+        
         # Create a deep copy of the parse result to avoid modifying the original
         updated_result = {
             'nodes': [],
@@ -152,9 +156,10 @@ def scan_parse_result_for_secrets(parse_result: Dict[str, List], filepath: str)
             
             # Collect findings for this node
             node_findings = []
-            for line_num, line_findings in line_to_findings.items():
-                if start_line <= line_num <= end_line:
-                    node_findings.extend(line_findings)
+            lo = bisect_left(finding_lines, start_line)
+            hi = bisect_right(finding_lines, end_line)
+            for line_num in finding_lines[lo:hi]:
+                node_findings.extend(line_to_findings[line_num])
             
             # Add findings to the node
             if node_findings:
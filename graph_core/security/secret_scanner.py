@@ -61,6 +61,14 @@ SECRET_PATTERNS: Dict[str, Dict[str, Any]] = {
 }
 
 
+# Cheap single-pass prefilter: every pattern in SECRET_PATTERNS requires one of these
+# literals, so lines that match none of them can skip the individual patterns.
+# Keep this in sync when adding patterns.
+SECRET_PREFILTER: Pattern = re.compile(
+    r"(?i)aws_|api|app|secret|access|token|passw|pwd|-----begin|://|eyj"
+)
+
+
 def redact_secret(text: str, start_index: int, length: int) -> str:
     """
     Redact part of the text by replacing with asterisks.
@@ -135,6 +143,10 @@ def scan_line_for_secrets(line: str, line_number: int, file_path: str) -> List[S
             ))
             return findings
     
+    # Most lines contain none of the trigger literals; reject them with one scan
+    if not SECRET_PREFILTER.search(line):
+        return findings
+    
     for secret_type, pattern_data in SECRET_PATTERNS.items():
         pattern = pattern_data["pattern"]
         confidence = pattern_data.get("confidence", "medium")
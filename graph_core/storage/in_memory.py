@@ -85,8 +85,9 @@ class InMemoryGraphStorage:
         if content_hash and not file_module_node_id:
             logger.warning(f"Content hash provided for {filepath}, but no corresponding module node found in parse result.")
 
-        # Add edges, using edge type as the key for MultiDiGraph
-        # Allow implicit node creation by add_edge
+        # Add edges, using edge type as the key for MultiDiGraph, in one bulk call
+        # Allow implicit node creation by add_edges_from
+        edge_items = []
         for edge in edges_to_add:
             source = edge.get('source')
             target = edge.get('target')
@@ -101,8 +102,10 @@ class InMemoryGraphStorage:
             edge_attrs.pop('target', None)
             edge_attrs.pop('type', None) # Type is used as key
             
-            # Let add_edge handle node creation if needed
-            self.graph.add_edge(source, target, key=edge_type, **edge_attrs)
+            edge_items.append((source, target, edge_type, edge_attrs))
+        
+        # Let add_edges_from handle node creation if needed
+        self.graph.add_edges_from(edge_items)
 
     def remove_file(self, filepath: str):
         """
@@ -208,6 +211,24 @@ class InMemoryGraphStorage:
                          processed_edges.add(edge_tuple)
         return edges
     
+    def get_out_edges(self, node_id: str) -> List[Dict[str, Any]]:
+        """Get the edges leaving the given node, read directly from its adjacency."""
+        if not self.graph.has_node(node_id):
+            return []
+        return [
+            dict(data, source=node_id, target=v, type=key)
+            for _, v, key, data in self.graph.out_edges(node_id, data=True, keys=True)
+        ]
+    
+    def get_in_edges(self, node_id: str) -> List[Dict[str, Any]]:
+        """Get the edges entering the given node, read directly from its adjacency."""
+        if not self.graph.has_node(node_id):
+            return []
+        return [
+            dict(data, source=u, target=node_id, type=key)
+            for u, _, key, data in self.graph.in_edges(node_id, data=True, keys=True)
+        ]
+    
     def get_node_count(self) -> int:
         """
         Get the total number of nodes in the graph.
@@ -6,6 +6,7 @@ for storing and manipulating code structure data.
 """
 
 import os
+import sys
 import json
 import logging
 import networkx as nx
@@ -13,12 +14,44 @@ import threading
 import time
 import random
 import hashlib
-from typing import Dict, List, Any, Set, Optional
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Any, Set, Optional, Tuple, BinaryIO
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
+def _json_default(value):
+    """Convert values the json module can't serialize natively (sets are stored as lists)."""
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Shared encoder, so per-record encoding doesn't rebuild one for every call
+_json_encoder = json.JSONEncoder(default=_json_default)
+
+# Markers of the one-record-per-line layout written by JSONGraphStorage.save_graph()
+_STREAM_HEADER = '{"nodes": [\n'
+_FILE_NODES_PREFIX = '"file_nodes": '
+
+
+def _fsync_directory(path: str) -> None:
+    """Flush a directory entry change (such as a rename) to disk where the platform allows it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories can't be opened on some platforms (e.g. Windows)
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 class JSONGraphStorage:
     """
     A JSON file-based implementation of a graph storage system.
@@ -26,29 +59,66 @@ class JSONGraphStorage:
     This class provides methods to add, update, and remove nodes and edges
     representing code structures, with tracking of which nodes came from which files.
     Data is persisted to a JSON file on disk.
+
+    Small, frequent updates (such as dynamic call counts) are appended to a
+    JSONL delta log next to the JSON file instead of rewriting the whole graph.
+    The log is replayed on load and folded back into the JSON file by save_graph().
     """
     
-    def __init__(self, json_path: str):
+    # Compact the delta log into the JSON file once it grows past this fraction of the base file
+    LOG_COMPACTION_RATIO = 0.5
+    
+    # Buffer size used when streaming the graph to disk
+    WRITE_BUFFER_SIZE = 1 << 20
+    
+    # Seconds the background writer waits before retrying a failed write
+    WRITE_RETRY_DELAY = 1.0
+    
+    def __init__(self, json_path: str, async_writes: bool = False):
         """
         Initialize the JSON graph storage.
         
         Args:
             json_path: Path to the JSON file where the graph will be stored
+            async_writes: If True, save_graph() hands the write to a background
+                thread and returns immediately. Use flush() to wait for pending
+                writes and close() to stop the thread.
         """
         self.json_path = json_path
         self.graph = nx.MultiDiGraph()
         self.file_nodes = {}  # Maps filepath to list of node IDs
         self._lock = threading.RLock()  # Reentrant lock for thread safety
         self._lock_file = f"{json_path}.lock"  # Path to the lock file
+        self._log_path = f"{json_path}.log"  # Path to the append-only delta log
+        self._batch_depth = 0  # Nesting level of batched() blocks
+        self._dirty = False  # Whether a save was deferred by batched()
+        self._pending_log = {}  # Elements logged inside batched(), in first-logged order
+        
+        # Background writer state (only used with async_writes)
+        self._write_cond = threading.Condition()
+        self._write_pending = False
+        self._writing = False
+        self._write_failed = False  # Whether the last background write failed and is queued for a retry
+        self._closing = False
+        self._writer_thread = None
         
         # Load existing graph if the file exists
         self.load_graph()
+        
+        if async_writes:
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop,
+                name="JSONGraphStorageWriter",
+                daemon=True
+            )
+            self._writer_thread.start()
     
     def load_graph(self) -> None:
         """
         Load the graph from the JSON file.
         
         If the file doesn't exist, an empty graph is initialized.
+        Any updates recorded in the delta log are replayed on top of the loaded graph.
         """
         with self._lock:
             # Reset the graph
@@ -58,32 +128,39 @@ class JSONGraphStorage:
             # If the file doesn't exist yet, don't try to load it
             if not os.path.exists(self.json_path):
                 logger.info(f"JSON file {self.json_path} doesn't exist yet - using empty graph")
+                self._replay_log()
                 return
             
             try:
                 # Acquire a read lock to ensure we don't read a partially written file
                 lock_acquired = self._acquire_file_lock()
                 
-                # Load the data from the JSON file
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Load nodes
-                for node_data in data.get('nodes', []):
-                    node_id = node_data.pop('id')
-                    self.graph.add_node(node_id, **node_data)
-                
-                # Load edges
-                for edge_data in data.get('edges', []):
-                    source = edge_data.pop('source')
-                    target = edge_data.pop('target')
-                    edge_type = edge_data.pop('type')
-                    self.graph.add_edge(source, target, key=edge_type, **edge_data)
+                # IDs and types repeat across nodes, edges and file_nodes; json creates a
+                # separate string for every occurrence, so intern them to share one copy
+                intern = sys.intern
                 
-                # Load file node mappings (convert lists to sets for internal representation)
-                file_nodes = data.get('file_nodes', {})
-                for file_path, node_ids in file_nodes.items():
-                    self.file_nodes[file_path] = set(node_ids)
+                # Load the data from the JSON file, one record at a time
+                with open(self.json_path, 'r', encoding='utf-8') as f:
+                    for kind, record in self._iter_graph_file(f):
+                        if kind == 'node':
+                            node_id = intern(record.pop('id'))
+                            if isinstance(record.get('type'), str):
+                                record['type'] = intern(record['type'])
+                            # Secret warnings draw their type and confidence from a handful of values
+                            for warning in record.get('secretWarnings') or ():
+                                for field in ('secretType', 'confidence'):
+                                    if isinstance(warning.get(field), str):
+                                        warning[field] = intern(warning[field])
+                            self.graph.add_node(node_id, **record)
+                        elif kind == 'edge':
+                            source = intern(record.pop('source'))
+                            target = intern(record.pop('target'))
+                            edge_type = intern(record.pop('type'))
+                            self.graph.add_edge(source, target, key=edge_type, **record)
+                        else:
+                            # Load file node mappings (convert lists to sets for internal representation)
+                            for file_path, node_ids in record.items():
+                                self.file_nodes[intern(file_path)] = set(map(intern, node_ids))
                 
                 # Count loaded nodes and edges
                 node_count = self.graph.number_of_nodes()
@@ -92,6 +169,9 @@ class JSONGraphStorage:
                 
                 logger.info(f"Loaded graph from {self.json_path} - {node_count} nodes, {edge_count} edges, {file_count} files")
                 
+                # Apply updates logged since the last full save
+                self._replay_log()
+                
             except json.JSONDecodeError as e:
                 logger.error(f"Error decoding JSON from {self.json_path}: {e}")
                 # If JSON is invalid, start with an empty graph
@@ -107,6 +187,46 @@ class JSONGraphStorage:
                 if lock_acquired:
                     self._release_file_lock()
     
+    def _iter_graph_file(self, f):
+        """
+        Yield ('node' | 'edge' | 'file_nodes', data) records from an open graph file.
+        
+        Files written by save_graph() hold one record per line, so they are parsed a line
+        at a time without materializing the whole document. Any other JSON layout
+        (e.g. a hand-written or pretty-printed file) is loaded in one go.
+        
+        Args:
+            f: The graph file, opened in text mode
+            
+        Raises:
+            json.JSONDecodeError: If the file isn't valid or is truncated
+        """
+        if f.readline() != _STREAM_HEADER:
+            f.seek(0)
+            data = json.load(f)
+            for node_data in data.get('nodes', []):
+                yield 'node', node_data
+            for edge_data in data.get('edges', []):
+                yield 'edge', edge_data
+            yield 'file_nodes', data.get('file_nodes', {})
+            return
+        
+        kind = 'node'
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line == '],':
+                continue
+            if line == '"edges": [':
+                kind = 'edge'
+            elif line.startswith(_FILE_NODES_PREFIX):
+                # The last line closes the document
+                yield 'file_nodes', json.loads(line[len(_FILE_NODES_PREFIX):-1])
+                return
+            else:
+                yield kind, json.loads(line[:-1] if line.endswith(',') else line)
+        
+        raise json.JSONDecodeError("Graph file ends before the file_nodes section", "", 0)
+    
     def _acquire_file_lock(self) -> bool:
         """
         Acquire a lock on the file for writing.
@@ -151,85 +271,360 @@ class JSONGraphStorage:
         except Exception as e:
             logger.error(f"Error releasing file lock: {e}")
     
-    def _convert_for_json(self, value):
+    def _write_json_array(self, f, records) -> None:
         """
-        Convert a value to be JSON serializable.
+        Stream an iterable of records into f as the body of a JSON array.
         
         Args:
-            value: The value to convert
-            
-        Returns:
-            A JSON serializable version of the value
+            f: The text file to write to
+            records: Iterable of JSON serializable records
         """
-        if isinstance(value, set):
-            return list(value)
-        elif isinstance(value, dict):
-            return {k: self._convert_for_json(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self._convert_for_json(v) for v in value]
-        else:
-            return value
+        encode = _json_encoder.encode
+        separator = ''
+        for record in records:
+            f.write(separator)
+            f.write(encode(record))
+            separator = ',\n'
 
-    def save_graph(self) -> None:
+    def save_graph(self) -> bool:
         """
         Save the graph data to the JSON file.
         
         This method writes all nodes, edges, and file-node mappings to the JSON file.
+        Records are streamed straight from the graph into a buffered file instead of
+        first building the whole document in memory.
         The operation is atomic, using a temporary file and rename to avoid data corruption.
+        With async_writes the write is queued for the background writer instead.
+        
+        Returns:
+            True if the graph was written (or deferred/queued for writing), False if the write failed
+        """
+        with self._lock:
+            if self._batch_depth:
+                # Inside batched(): save once when the outermost block exits
+                self._dirty = True
+                return True
+            self._dirty = False
+        
+        if self._writer_thread is not None:
+            with self._write_cond:
+                # Requests made while a write is queued collapse into that write
+                self._write_pending = True
+                self._write_cond.notify_all()
+            return True
+        
+        return self._write_graph()
+    
+    def flush(self) -> None:
         """
-        lock_acquired = self._acquire_file_lock()
-        if not lock_acquired:
-            logger.warning(f"Could not acquire lock to save graph to {self.json_path}")
+        Save the graph and wait until it has been written to disk.
+        
+        With async_writes this returns once the background writer has made an
+        attempt; a failed write stays queued and is retried in the background.
+        """
+        self.save_graph()
+        if self._writer_thread is None:
             return
+        with self._write_cond:
+            self._write_failed = False
+            while (self._write_pending or self._writing) and not self._write_failed:
+                self._write_cond.wait()
+    
+    def close(self) -> None:
+        """Write any pending changes and stop the background writer, if running."""
+        if self._writer_thread is None:
+            return
+        with self._write_cond:
+            self._closing = True
+            self._write_cond.notify_all()
+        self._writer_thread.join()
+        self._writer_thread = None
+    
+    def _writer_loop(self) -> None:
+        """
+        Background thread body: write the graph whenever a save has been requested.
         
-        try:
-            # Create the dictionary to export
-            data = {
-                'nodes': [],
-                'edges': [],
-                'file_nodes': {}
-            }
-            
-            # Add nodes with their attributes
-            for node_id, attrs in self.graph.nodes(data=True):
-                node_data = {'id': node_id}
-                node_data.update(attrs)
-                # Convert sets to lists for JSON serialization
-                node_data = self._convert_for_json(node_data)
-                data['nodes'].append(node_data)
+        A failed write is queued again and retried after WRITE_RETRY_DELAY seconds,
+        or as soon as another save is requested. When closing, a failed write is
+        only retried once so close() can't hang on a file that can't be written.
+        """
+        while True:
+            with self._write_cond:
+                while not self._write_pending and not self._closing:
+                    self._write_cond.wait()
+                if not self._write_pending:
+                    return
+                self._write_pending = False
+                self._writing = True
+                closing = self._closing
+            try:
+                written = self._write_graph(snapshot=True)
+            except Exception as e:
+                logger.error(f"Error in background writer for {self.json_path}: {e}")
+                written = False
+            with self._write_cond:
+                self._writing = False
+                self._write_failed = not written
+                if not written:
+                    if closing:
+                        logger.error(f"Giving up on pending write to {self.json_path} while closing")
+                    else:
+                        self._write_pending = True
+                self._write_cond.notify_all()
+                if not written and not closing:
+                    # Back off before retrying; a close() or new save wakes the writer early
+                    self._write_cond.wait(self.WRITE_RETRY_DELAY)
+    
+    def _write_graph(self, snapshot: bool = False) -> bool:
+        """
+        Write the current graph to the JSON file, returning True on success.
+        
+        Args:
+            snapshot: If True, serialize a copy of the graph taken under the storage
+                lock. The background writer uses this because callers such as
+                DependencyGraphManager change the graph without holding the lock.
+        """
+        with self._lock:
+            lock_acquired = self._acquire_file_lock()
+            if not lock_acquired:
+                logger.warning(f"Could not acquire lock to save graph to {self.json_path}")
+                return False
             
-            # Add edges with their attributes
-            for source, target, key, attrs in self.graph.edges(data=True, keys=True):
-                edge_data = {
-                    'source': source,
-                    'target': target,
-                    'type': key
-                }
-                edge_data.update(attrs)
-                # Convert sets to lists for JSON serialization
-                edge_data = self._convert_for_json(edge_data)
-                data['edges'].append(edge_data)
+            graph = self.graph
+            file_nodes = self.file_nodes
+            if snapshot:
+                try:
+                    graph = self.graph.copy()
+                    file_nodes = {filepath: list(node_ids) for filepath, node_ids in self.file_nodes.items()}
+                except Exception:
+                    self._release_file_lock()
+                    raise
+        
+            temp_file = None
+            try:
+                # Write to a temporary file in the same directory first, then rename for atomic update
+                json_dir = os.path.dirname(os.path.abspath(self.json_path))
+                fd, temp_file = tempfile.mkstemp(
+                    dir=json_dir,
+                    prefix=f".{os.path.basename(self.json_path)}.",
+                    suffix=".tmp"
+                )
+                # mkstemp creates the file as owner-only; keep the graph file's usual permissions
+                try:
+                    mode = os.stat(self.json_path).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                os.chmod(temp_file, mode)
+                with os.fdopen(fd, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
+                    f.write(_STREAM_HEADER)
+                    self._write_json_array(f, (
+                        dict(attrs, id=node_id)
+                        for node_id, attrs in graph.nodes(data=True)
+                    ))
+                    f.write('\n],\n"edges": [\n')
+                    self._write_json_array(f, (
+                        dict(attrs, source=source, target=target, type=key)
+                        for source, target, key, attrs in graph.edges(data=True, keys=True)
+                    ))
+                    f.write('\n],\n' + _FILE_NODES_PREFIX)
+                    f.write(_json_encoder.encode(file_nodes))
+                    f.write('}\n')
+                    # Make sure the data is on disk before it replaces the old file
+                    f.flush()
+                    os.fsync(f.fileno())
             
-            # Convert file_nodes mapping to proper format
-            for file_path, node_ids in self.file_nodes.items():
-                data['file_nodes'][file_path] = list(node_ids)
+                # Rename the temp file to the actual file (atomic operation)
+                # This prevents data corruption if the process is interrupted during writing
+                os.replace(temp_file, self.json_path)
+                temp_file = None
+                _fsync_directory(json_dir)
             
-            # Write to a temporary file first, then rename for atomic update
-            temp_file = f"{self.json_path}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
+                # The JSON file now contains every logged update, so the log can be dropped
+                if os.path.exists(self._log_path):
+                    os.remove(self._log_path)
             
-            # Rename the temp file to the actual file (atomic operation)
-            # This prevents data corruption if the process is interrupted during writing
-            os.replace(temp_file, self.json_path)
+                logger.info(f"Saved graph to {self.json_path}")
+                return True
+            except (IOError, OSError) as e:
+                logger.error(f"Error saving graph to {self.json_path}: {e}")
+                return False
+            finally:
+                # Don't leave a partially written temp file behind
+                if temp_file is not None and os.path.exists(temp_file):
+                    os.remove(temp_file)
+                # Always release the lock, even if an error occurred
+                if lock_acquired:
+                    self._release_file_lock()
+    
+    @contextmanager
+    def batched(self):
+        """
+        Defer save_graph() calls and delta log updates made inside the block.
+        
+        The graph is written at most once, when the outermost batched() block exits,
+        and only if something inside it asked for a save. Otherwise, each node or edge
+        logged inside the block gets a single log record holding its final state.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                records = []
+                save_needed = False
+                if self._batch_depth == 0:
+                    save_needed = self._dirty
+                    if not save_needed:
+                        records = [r for r in map(self._log_record, self._pending_log) if r]
+                    self._pending_log = {}
+            if save_needed:
+                # A full save already includes every pending log update
+                self.save_graph()
+            elif records:
+                self._append_log(records)
+    
+    def log_node_update(self, node_id: str) -> None:
+        """
+        Persist the current attributes of a node by appending them to the delta log.
+        
+        Args:
+            node_id: The ID of the node to persist
+        """
+        self._log_update(('node', node_id))
+    
+    def log_edge_update(self, source: str, target: str, edge_type: str) -> None:
+        """
+        Persist the current attributes of an edge by appending them to the delta log.
+        
+        Args:
+            source: ID of the source node
+            target: ID of the target node
+            edge_type: Type (key) of the edge
+        """
+        self._log_update(('edge', source, target, edge_type))
+    
+    def log_file_rename(self, old_path: str, new_path: str) -> None:
+        """
+        Persist a move of file_nodes tracking from old_path to new_path to the delta log.
+        
+        Args:
+            old_path: The original filepath
+            new_path: The new filepath after rename
+        """
+        self._log_update(('rename_file', old_path, new_path))
+    
+    def compact(self) -> None:
+        """Fold the delta log into the JSON file."""
+        with self._lock:
+            self.save_graph()
+    
+    def _log_update(self, key: Tuple[str, ...]) -> None:
+        """
+        Log the current state of a graph element, or queue it if inside batched().
+        
+        Args:
+            key: ('node', node_id), ('edge', source, target, edge_type) or
+                ('rename_file', old_path, new_path)
+        """
+        with self._lock:
+            if self._batch_depth:
+                self._pending_log[key] = None
+                return
+            record = self._log_record(key)
+        if record:
+            self._append_log([record])
+    
+    def _log_record(self, key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """
+        Build the delta log record for a graph element from its current attributes.
+        
+        Args:
+            key: ('node', node_id), ('edge', source, target, edge_type) or
+                ('rename_file', old_path, new_path)
             
-            logger.info(f"Saved graph to {self.json_path}")
+        Returns:
+            The log record, or None if the element is no longer in the graph
+        """
+        if key[0] == 'rename_file':
+            _, old_path, new_path = key
+            return {'op': 'rename_file', 'old_path': old_path, 'new_path': new_path}
+        
+        if key[0] == 'node':
+            _, node_id = key
+            attrs = self.graph.nodes.get(node_id)
+            if attrs is None:
+                return None
+            return {'op': 'node', 'id': node_id, 'attrs': dict(attrs)}
+        
+        _, source, target, edge_type = key
+        if not self.graph.has_edge(source, target, key=edge_type):
+            return None
+        return {
+            'op': 'edge',
+            'source': source,
+            'target': target,
+            'type': edge_type,
+            'attrs': dict(self.graph.edges[source, target, edge_type])
+        }
+    
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append records to the delta log, compacting it if it has grown too large.
+        
+        Args:
+            records: The log records to append
+        """
+        try:
+            with open(self._log_path, 'a', encoding='utf-8') as f:
+                f.writelines(_json_encoder.encode(record) + '\n' for record in records)
         except (IOError, OSError) as e:
-            logger.error(f"Error saving graph to {self.json_path}: {e}")
-        finally:
-            # Always release the lock, even if an error occurred
-            if lock_acquired:
-                self._release_file_lock()
+            logger.error(f"Error appending to log {self._log_path}: {e}")
+            return
+        
+        try:
+            log_size = os.path.getsize(self._log_path)
+            base_size = os.path.getsize(self.json_path) if os.path.exists(self.json_path) else 0
+        except OSError:
+            return
+        
+        if log_size > self.LOG_COMPACTION_RATIO * base_size:
+            self.compact()
+    
+    def _replay_log(self) -> None:
+        """Apply the records from the delta log to the in-memory graph."""
+        if not os.path.exists(self._log_path):
+            return
+        
+        replayed = 0
+        with open(self._log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written record (e.g. after a crash) is skipped
+                    logger.warning(f"Skipping malformed record in {self._log_path}")
+                    continue
+                
+                op = record.get('op')
+                if op == 'node':
+                    self.graph.add_node(record['id'], **record.get('attrs', {}))
+                elif op == 'edge':
+                    self.graph.add_edge(record['source'], record['target'],
+                                        key=record['type'], **record.get('attrs', {}))
+                elif op == 'rename_file':
+                    node_ids = self.file_nodes.pop(record['old_path'], set())
+                    self.file_nodes.setdefault(record['new_path'], set()).update(node_ids)
+                else:
+                    logger.warning(f"Unknown operation {op!r} in {self._log_path}")
+                    continue
+                replayed += 1
+        
+        logger.info(f"Replayed {replayed} logged updates from {self._log_path}")
     
     def add_or_update_file(self, filepath: str, parse_result: Dict[str, List[Dict[str, Any]]], content_hash: Optional[str] = None):
         """
@@ -255,7 +650,9 @@ class JSONGraphStorage:
                     file_module_node_id = node_data['id']
                     break
 
-            # --- Pass 2: Add/Update nodes --- 
+            # --- Pass 2: Build node attributes, then insert them in one bulk call --- 
+            graph_nodes = self.graph.nodes
+            nodes_to_add = []
             for node_data in parse_result.get('nodes', []):
                 node_id = node_data['id']
                 node_attrs = node_data.copy()
@@ -264,8 +661,8 @@ class JSONGraphStorage:
                 if node_id == file_module_node_id and content_hash:
                     node_attrs['content_hash'] = content_hash
 
-                if self.graph.has_node(node_id):
-                    node = self.graph.nodes[node_id]
+                node = graph_nodes.get(node_id)
+                if node is not None:
                     files = set(node.get('files', []))
                     files.add(filepath)
                     node_attrs['files'] = list(files)
@@ -275,24 +672,27 @@ class JSONGraphStorage:
                 else:
                     node_attrs['files'] = [filepath]
 
-                self.graph.add_node(node_id, **node_attrs)
-                self.file_nodes[filepath].add(node_id)
+                nodes_to_add.append((node_id, node_attrs))
+
+            self.graph.add_nodes_from(nodes_to_add)
+            self.file_nodes[filepath].update(node_id for node_id, _ in nodes_to_add)
 
             if content_hash and not file_module_node_id:
                  logger.warning(f"No module node found for {filepath} to store content hash.")
 
-            # Process edges (logic remains similar, ensuring nodes exist)
+            # Validate edges (ensuring nodes exist), then insert them in one bulk call
+            edges_to_add = []
             for edge_data in parse_result.get('edges', []):
                 source = edge_data['source']
                 target = edge_data['target']
                 edge_type = edge_data.get('type', 'default') # Use get with default
 
                 # Ensure source/target nodes exist (might have been created above)
-                if not self.graph.has_node(source):
+                if source not in graph_nodes:
                      # This might happen if the parse result is inconsistent
                      logger.warning(f"Edge source node {source} not found for file {filepath}, skipping edge.")
                      continue
-                if not self.graph.has_node(target):
+                if target not in graph_nodes:
                      if target.startswith('module:'): # Auto-create missing module targets
                          self.graph.add_node(target, type='module', name=target.split(':')[1], files=[filepath])
                          if filepath in self.file_nodes: self.file_nodes[filepath].add(target)
@@ -306,8 +706,10 @@ class JSONGraphStorage:
                 attrs.pop('type', None) # Pop type as it's used as key
                 attrs['file'] = filepath
 
-                # Add edge using type as key
-                self.graph.add_edge(source, target, key=edge_type, **attrs)
+                # Edge type is used as the key
+                edges_to_add.append((source, target, edge_type, attrs))
+
+            self.graph.add_edges_from(edges_to_add)
 
             # Save the updated graph
             self.save_graph()
@@ -385,12 +787,7 @@ class JSONGraphStorage:
             List of node dictionaries with id and attributes
         """
         with self._lock:
-            result = []
-            for node_id, attrs in self.graph.nodes(data=True):
-                node_data = {'id': node_id}
-                node_data.update(attrs)
-                result.append(node_data)
-            return result
+            return [dict(attrs, id=node_id) for node_id, attrs in self.graph.nodes(data=True)]
     
     def get_all_edges(self) -> List[Dict[str, Any]]:
         """
@@ -400,16 +797,10 @@ class JSONGraphStorage:
             List of edge dictionaries with source, target, type and attributes
         """
         with self._lock:
-            result = []
-            for source, target, key, attrs in self.graph.edges(data=True, keys=True):
-                edge_data = {
-                    'source': source,
-                    'target': target,
-                    'type': key
-                }
-                edge_data.update(attrs)
-                result.append(edge_data)
-            return result
+            return [
+                dict(attrs, source=source, target=target, type=key)
+                for source, target, key, attrs in self.graph.edges(data=True, keys=True)
+            ]
     
     def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -422,12 +813,10 @@ class JSONGraphStorage:
             Node dictionary with attributes or None if not found
         """
         with self._lock:
-            if not self.graph.has_node(node_id):
+            attrs = self.graph.nodes.get(node_id)
+            if attrs is None:
                 return None
-            
-            node_data = {'id': node_id}
-            node_data.update(self.graph.nodes[node_id])
-            return node_data
+            return dict(attrs, id=node_id)
     
     def get_edges_for_nodes(self, node_ids: Set[str]) -> List[Dict[str, Any]]:
         """
@@ -446,27 +835,55 @@ class JSONGraphStorage:
                     continue
                 
                 # Get outgoing edges
-                for _, target, key, attrs in self.graph.out_edges(node_id, data=True, keys=True):
-                    edge_data = {
-                        'source': node_id,
-                        'target': target,
-                        'type': key
-                    }
-                    edge_data.update(attrs)
-                    result.append(edge_data)
+                result.extend(
+                    dict(attrs, source=node_id, target=target, type=key)
+                    for _, target, key, attrs in self.graph.out_edges(node_id, data=True, keys=True)
+                )
                 
                 # Get incoming edges
-                for source, _, key, attrs in self.graph.in_edges(node_id, data=True, keys=True):
-                    edge_data = {
-                        'source': source,
-                        'target': node_id,
-                        'type': key
-                    }
-                    edge_data.update(attrs)
-                    result.append(edge_data)
+                result.extend(
+                    dict(attrs, source=source, target=node_id, type=key)
+                    for source, _, key, attrs in self.graph.in_edges(node_id, data=True, keys=True)
+                )
             
             return result
     
+    def get_out_edges(self, node_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the edges leaving the given node.
+        
+        Args:
+            node_id: ID of the source node
+            
+        Returns:
+            List of edge dictionaries
+        """
+        with self._lock:
+            if not self.graph.has_node(node_id):
+                return []
+            return [
+                dict(attrs, source=node_id, target=target, type=key)
+                for _, target, key, attrs in self.graph.out_edges(node_id, data=True, keys=True)
+            ]
+    
+    def get_in_edges(self, node_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the edges entering the given node.
+        
+        Args:
+            node_id: ID of the target node
+            
+        Returns:
+            List of edge dictionaries
+        """
+        with self._lock:
+            if not self.graph.has_node(node_id):
+                return []
+            return [
+                dict(attrs, source=source, target=node_id, type=key)
+                for source, _, key, attrs in self.graph.in_edges(node_id, data=True, keys=True)
+            ]
+    
     def get_nodes_for_file(self, filepath: str) -> List[Dict[str, Any]]:
         """
         Get all nodes associated with a specific file.
@@ -478,17 +895,12 @@ class JSONGraphStorage:
             List of node dictionaries
         """
         with self._lock:
-            result = []
-            if filepath not in self.file_nodes:
-                return result
-            
-            for node_id in self.file_nodes[filepath]:
-                if self.graph.has_node(node_id):
-                    node_data = {'id': node_id}
-                    node_data.update(self.graph.nodes[node_id])
-                    result.append(node_data)
-            
-            return result
+            nodes = self.graph.nodes
+            return [
+                dict(nodes[node_id], id=node_id)
+                for node_id in self.file_nodes.get(filepath, ())
+                if node_id in nodes
+            ]
     
     def get_edges_for_file(self, filepath: str) -> List[Dict[str, Any]]:
         """
@@ -501,18 +913,11 @@ class JSONGraphStorage:
             List of edge dictionaries
         """
         with self._lock:
-            result = []
-            for source, target, key, attrs in self.graph.edges(data=True, keys=True):
-                if attrs.get('file') == filepath:
-                    edge_data = {
-                        'source': source,
-                        'target': target,
-                        'type': key
-                    }
-                    edge_data.update(attrs)
-                    result.append(edge_data)
-            
-            return result
+            return [
+                dict(attrs, source=source, target=target, type=key)
+                for source, target, key, attrs in self.graph.edges(data=True, keys=True)
+                if attrs.get('file') == filepath
+            ]
     
     def get_node_count(self) -> int:
         """
@@ -549,4 +954,17 @@ class JSONGraphStorage:
 # Helper function for hashing (can be placed here or in a utils module)
 def calculate_content_hash(content: bytes) -> str:
     """Calculates the SHA-256 hash of the given content."""
-    return hashlib.sha256(content).hexdigest()
\ No newline at end of file
+    return hashlib.sha256(content).hexdigest()
+
+# Read size used when hashing files, so memory use doesn't grow with the file
+HASH_CHUNK_SIZE = 1 << 16
+
+def calculate_file_hash(f: BinaryIO) -> str:
+    """Calculates the SHA-256 hash of a binary file's content, reading it in fixed-size chunks."""
+    # hashlib.file_digest (Python 3.11+) reads into one reusable buffer instead of a new bytes per chunk
+    if hasattr(hashlib, 'file_digest') and hasattr(f, 'readinto'):
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
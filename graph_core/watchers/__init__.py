@@ -2,6 +2,9 @@
 Watchers package for monitoring changes in various sources.
 """
 
-from graph_core.watchers.file_watcher import start_file_watcher, stop_file_watcher, EventType
+from graph_core.watchers.file_watcher import (
+    start_file_watcher, start_bulk_file_watcher, stop_file_watcher, iter_file_events, WatcherDispatcher, EventType
+)
 
-__all__ = ['start_file_watcher', 'stop_file_watcher', 'EventType'] 
\ No newline at end of file
+__all__ = ['start_file_watcher', 'start_bulk_file_watcher', 'stop_file_watcher', 'iter_file_events', 'WatcherDispatcher',
+           'EventType'] 
\ No newline at end of file
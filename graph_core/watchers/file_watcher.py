@@ -8,8 +8,10 @@ using the watchfiles library.
 import os
 import time
 import logging
+import threading
 from enum import Enum
-from typing import Callable, Optional
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from watchfiles import watch, Change
 
 # Set up logging
@@ -22,6 +24,39 @@ class EventType(str, Enum):
     DELETED = 'deleted'
 
 
+# How long (in milliseconds) the directory must be quiet before a batch of changes is yielded,
+# and how often (in milliseconds) watchfiles checks for new changes while waiting
+DEFAULT_DEBOUNCE_MS = 1600
+DEFAULT_STEP_MS = 50
+
+# How often (in milliseconds) to poll for changes when polling is used, and the longer
+# interval used on network filesystems, where inotify doesn't see remote changes
+DEFAULT_POLL_DELAY_MS = 300
+NETWORK_POLL_DELAY_MS = 2000
+
+# Filesystem types (as listed in /proc/mounts) that are watched by polling
+_NETWORK_FILESYSTEMS = frozenset({'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', '9p', 'fuse.sshfs'})
+
+# Largest number of events yielded at once by iter_file_events
+DEFAULT_BATCH_SIZE = 1000
+
+# Largest number of distinct files a WatcherDispatcher holds before the watcher has to wait
+DEFAULT_MAX_PENDING = 10000
+
+# Order in which start_bulk_file_watcher hands over each batch's event groups, matching
+# _EVENT_PRIORITY. Deletions go first so the graph drops the removed files' nodes before the
+# batch's new and changed files are parsed. (The deleted files' nodes are gone by then, so
+# this order does not let created files be matched against them as renames.)
+_BULK_DISPATCH_ORDER = (EventType.DELETED.value, EventType.CREATED.value, EventType.MODIFIED.value)
+
+# When a file has several changes in one batch, the one with the highest priority is dispatched
+_EVENT_PRIORITY = {
+    EventType.MODIFIED: 0,
+    EventType.CREATED: 1,
+    EventType.DELETED: 2,
+}
+
+
 def _map_event_type(change_type: Change) -> EventType:
     """
     Maps watchfiles Change enum to our EventType enum.
@@ -40,20 +75,99 @@ def _map_event_type(change_type: Change) -> EventType:
     return mapping.get(change_type, EventType.MODIFIED)
 
 
-def start_file_watcher(callback: Callable[[str, str], None], watch_dir: str = 'src') -> None:
+def _coalesce_changes(changes: Iterable[Tuple[Change, str]]) -> Dict[str, EventType]:
     """
-    Start watching a directory for file changes.
+    Collapses a batch of changes into a single event per file.
+    
+    Editors often report one save as several changes to the same file. Deleted
+    takes priority over created, which takes priority over modified. A file that
+    was deleted and re-created within the batch (an atomic save) still exists,
+    so it is reported as created rather than deleted.
+    
+    Args:
+        changes: The (Change, path) pairs of one watchfiles batch
+        
+    Returns:
+        Dict[str, EventType]: The event to dispatch for each changed path
+    """
+    events: Dict[str, EventType] = {}
+    recreated = set()
+    for change_type, file_path in changes:
+        event_type = _map_event_type(change_type)
+        current = events.get(file_path)
+        if current is None or _EVENT_PRIORITY[event_type] > _EVENT_PRIORITY[current]:
+            events[file_path] = event_type
+        if {current, event_type} == {EventType.CREATED, EventType.DELETED}:
+            recreated.add(file_path)
+    
+    for file_path in recreated:
+        if os.path.exists(file_path):
+            events[file_path] = EventType.CREATED
+    return events
+
+
+def _is_network_filesystem(path: str) -> bool:
+    """
+    Checks whether a path is on a network filesystem, using /proc/mounts.
+    
+    Args:
+        path: The path to check
+        
+    Returns:
+        bool: True if the path's mount is a known network filesystem; False otherwise,
+        including on platforms without /proc/mounts
+    """
+    real_path = os.path.realpath(path)
+    best_mount, best_type = '', ''
+    try:
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # Spaces in mount points are escaped as \040
+                mount_point, fs_type = fields[1].replace('\\040', ' '), fields[2]
+                if (real_path == mount_point or real_path.startswith(mount_point.rstrip(os.sep) + os.sep)) \
+                        and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, fs_type
+    except OSError:
+        return False
+    return best_type in _NETWORK_FILESYSTEMS
+
+
+def iter_file_events(watch_dir: str = 'src', batch_size: int = DEFAULT_BATCH_SIZE,
+                     debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+                     step_ms: int = DEFAULT_STEP_MS,
+                     suffixes: Optional[Tuple[str, ...]] = None,
+                     force_polling: Optional[bool] = None,
+                     poll_delay_ms: Optional[int] = None) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Watch a directory and yield its file changes in batches.
+    
+    Each batch holds at most batch_size (event_type, file_path) pairs, so a
+    large burst of changes is handed over in pieces as the caller asks for them.
     
     Args:
-        callback: A function that will be called when a file change is detected.
-                 The callback should accept two parameters:
-                 - event_type: A string, one of 'created', 'modified', 'deleted'
-                 - file_path: The path to the file that changed
         watch_dir: The directory to watch for changes. Defaults to 'src'.
+        batch_size: Largest number of events in one yielded batch.
+        debounce_ms: How long the directory must be quiet before its changes are
+                     yielded. Changes to a file within one watchfiles batch are
+                     coalesced into a single event.
+        step_ms: How often to check for new changes while waiting for quiet.
+        suffixes: If given, only changes to files ending with one of these
+                  lowercase suffixes are yielded (e.g. ('.py', '.js')).
+        force_polling: Whether to poll for changes instead of using OS notifications.
+                       By default, polling is used only on network filesystems.
+        poll_delay_ms: How often to poll when polling. Defaults to a longer interval
+                       on network filesystems.
+        
+    Returns:
+        Iterator[List[Tuple[str, str]]]: Batches of (event_type, file_path) pairs,
+        where event_type is one of 'created', 'modified', 'deleted'
         
     Raises:
         FileNotFoundError: If the watch_dir does not exist
-        PermissionError: If there are permission issues accessing the directory
+        NotADirectoryError: If the watch_dir is not a directory
     """
     if not os.path.exists(watch_dir):
         logger.error(f"Directory not found: {watch_dir}")
@@ -63,17 +177,130 @@ def start_file_watcher(callback: Callable[[str, str], None], watch_dir: str = 's
         logger.error(f"Path is not a directory: {watch_dir}")
         raise NotADirectoryError(f"Path is not a directory: {watch_dir}")
     
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    
+    on_network_fs = _is_network_filesystem(watch_dir)
+    if force_polling is None and on_network_fs:
+        logger.info(f"{watch_dir} is on a network filesystem; watching it by polling")
+        force_polling = True
+    # watchfiles < 0.19 hands force_polling straight to RustNotify, which needs a bool
+    force_polling = bool(force_polling)
+    if poll_delay_ms is None:
+        poll_delay_ms = NETWORK_POLL_DELAY_MS if on_network_fs else DEFAULT_POLL_DELAY_MS
+    
+    def batches() -> Iterator[List[Tuple[str, str]]]:
+        for changes in watch(watch_dir, debounce=debounce_ms, step=step_ms,
+                             force_polling=force_polling, poll_delay_ms=poll_delay_ms):
+            if suffixes is not None:
+                changes = [change for change in changes if change[1].lower().endswith(suffixes)]
+            events = ((event_type.value, file_path) for file_path, event_type in _coalesce_changes(changes).items())
+            while batch := list(islice(events, batch_size)):
+                yield batch
+    
+    logger.info(f"Starting file watcher on directory: {watch_dir}")
+    return batches()
+
+
+def start_file_watcher(callback: Callable[[str, str], None], watch_dir: str = 'src',
+                       debounce_ms: int = DEFAULT_DEBOUNCE_MS, step_ms: int = DEFAULT_STEP_MS,
+                       suffixes: Optional[Tuple[str, ...]] = None,
+                       force_polling: Optional[bool] = None, poll_delay_ms: Optional[int] = None) -> None:
+    """
+    Start watching a directory for file changes.
+    
+    Args:
+        callback: A function that will be called when a file change is detected.
+                 The callback should accept two parameters:
+                 - event_type: A string, one of 'created', 'modified', 'deleted'
+                 - file_path: The path to the file that changed
+        watch_dir: The directory to watch for changes. Defaults to 'src'.
+        debounce_ms: How long the directory must be quiet before a batch of changes
+                     is dispatched. Changes to a file within one batch are coalesced
+                     into a single callback.
+        step_ms: How often to check for new changes while waiting for quiet.
+        suffixes: If given, the callback is only called for files ending with one
+                  of these lowercase suffixes (e.g. ('.py', '.js')).
+        force_polling: Whether to poll for changes instead of using OS notifications.
+                       By default, polling is used only on network filesystems.
+        poll_delay_ms: How often to poll when polling.
+        
+    Raises:
+        FileNotFoundError: If the watch_dir does not exist
+        PermissionError: If there are permission issues accessing the directory
+    """
+    def dispatch(batch: List[Tuple[str, str]]) -> None:
+        for event_type, file_path in batch:
+            logger.debug(f"File change detected: {event_type} - {file_path}")
+            
+            try:
+                callback(event_type, file_path)
+            except Exception as e:
+                logger.error(f"Error in callback function: {str(e)}")
+    
+    batches = iter_file_events(watch_dir, debounce_ms=debounce_ms, step_ms=step_ms, suffixes=suffixes,
+                               force_polling=force_polling, poll_delay_ms=poll_delay_ms)
+    _run_watcher(batches, dispatch)
+
+
+def start_bulk_file_watcher(callback: Callable[[str, List[str]], None], watch_dir: str = 'src',
+                            debounce_ms: int = DEFAULT_DEBOUNCE_MS, step_ms: int = DEFAULT_STEP_MS,
+                            suffixes: Optional[Tuple[str, ...]] = None,
+                            force_polling: Optional[bool] = None, poll_delay_ms: Optional[int] = None) -> None:
+    """
+    Start watching a directory for file changes, handing them over grouped by event type.
+    
+    Args:
+        callback: A function that will be called once per event type in each batch
+                 of changes. The callback should accept two parameters:
+                 - event_type: A string, one of 'created', 'modified', 'deleted'
+                 - file_paths: The paths of the files with that kind of change
+                 Deletions are handed over first, then creations, then modifications.
+        watch_dir: The directory to watch for changes. Defaults to 'src'.
+        debounce_ms: How long the directory must be quiet before a batch of changes
+                     is dispatched.
+        step_ms: How often to check for new changes while waiting for quiet.
+        suffixes: If given, only files ending with one of these lowercase suffixes
+                  are handed over (e.g. ('.py', '.js')).
+        force_polling: Whether to poll for changes instead of using OS notifications.
+                       By default, polling is used only on network filesystems.
+        poll_delay_ms: How often to poll when polling.
+        
+    Raises:
+        FileNotFoundError: If the watch_dir does not exist
+        PermissionError: If there are permission issues accessing the directory
+    """
+    def dispatch(batch: List[Tuple[str, str]]) -> None:
+        groups: Dict[str, List[str]] = {event_type: [] for event_type in _BULK_DISPATCH_ORDER}
+        for event_type, file_path in batch:
+            groups[event_type].append(file_path)
+        
+        for event_type, file_paths in groups.items():
+            if not file_paths:
+                continue
+            logger.debug(f"File changes detected: {event_type} - {len(file_paths)} files")
+            try:
+                callback(event_type, file_paths)
+            except Exception as e:
+                logger.error(f"Error in callback function: {str(e)}")
+    
+    batches = iter_file_events(watch_dir, debounce_ms=debounce_ms, step_ms=step_ms, suffixes=suffixes,
+                               force_polling=force_polling, poll_delay_ms=poll_delay_ms)
+    _run_watcher(batches, dispatch)
+
+
+def _run_watcher(batches: Iterator[List[Tuple[str, str]]],
+                 dispatch: Callable[[List[Tuple[str, str]]], None]) -> None:
+    """
+    Pass each batch of file events to dispatch until the watcher is interrupted.
+    
+    Args:
+        batches: Batches of (event_type, file_path) pairs, as from iter_file_events
+        dispatch: Function that handles one batch
+    """
     try:
-        logger.info(f"Starting file watcher on directory: {watch_dir}")
-        for changes in watch(watch_dir):
-            for change_type, file_path in changes:
-                event_type = _map_event_type(change_type)
-                logger.debug(f"File change detected: {event_type.value} - {file_path}")
-                
-                try:
-                    callback(event_type.value, file_path)
-                except Exception as e:
-                    logger.error(f"Error in callback function: {str(e)}")
+        for batch in batches:
+            dispatch(batch)
     except KeyboardInterrupt:
         logger.info("File watcher stopped by user")
     except PermissionError as e:
@@ -84,6 +311,113 @@ def start_file_watcher(callback: Callable[[str, str], None], watch_dir: str = 's
         raise
 
 
+class WatcherDispatcher:
+    """
+    Hands file events to a callback on a worker thread, so slow handling doesn't stall the watcher.
+    
+    An instance is itself a (event_type, file_path) callback and can be passed to
+    start_file_watcher. Events are queued in arrival order, one entry per file: an
+    event for a file that is still queued replaces the queued one, except that a
+    queued 'created' is kept over a later 'modified'. When max_pending files are
+    queued, the watcher waits until the worker catches up, so no events are lost.
+    """
+    
+    def __init__(self, callback: Callable[[str, str], None], max_pending: int = DEFAULT_MAX_PENDING,
+                 thread_factory: Callable[..., threading.Thread] = threading.Thread):
+        """
+        Initialize the dispatcher and start its worker thread.
+        
+        Args:
+            callback: Function called on the worker thread with (event_type, file_path)
+            max_pending: Largest number of files queued at once
+            thread_factory: Callable used to create the worker thread,
+                called with the same arguments as threading.Thread
+        """
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be at least 1, got {max_pending}")
+        self._callback = callback
+        self._max_pending = max_pending
+        self._pending: Dict[str, str] = {}  # Insertion-ordered: file_path -> event_type
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = thread_factory(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def __call__(self, event_type: str, file_path: str) -> None:
+        """
+        Queue an event for the worker thread.
+        
+        Args:
+            event_type: One of 'created', 'modified', 'deleted'
+            file_path: The path to the file that changed
+            
+        Raises:
+            RuntimeError: If the dispatcher has been closed
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WatcherDispatcher is closed")
+            
+            queued = self._pending.get(file_path)
+            if queued is not None:
+                if not (queued == EventType.CREATED and event_type == EventType.MODIFIED):
+                    self._pending[file_path] = event_type
+                return
+            
+            while len(self._pending) >= self._max_pending and not self._closed:
+                self._condition.wait()
+            self._pending[file_path] = event_type
+            self._condition.notify_all()
+    
+    def _run(self) -> None:
+        """Call the callback for queued events until the dispatcher is closed and drained."""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                file_path = next(iter(self._pending))
+                event_type = self._pending.pop(file_path)
+                self._busy = True
+                self._condition.notify_all()
+            
+            try:
+                self._callback(event_type, file_path)
+            except Exception as e:
+                logger.error(f"Error in callback function: {str(e)}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+    
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event has been handled.
+        
+        Args:
+            timeout: Longest time to wait, in seconds (None to wait indefinitely)
+            
+        Returns:
+            bool: True if the queue was drained, False if the timeout expired first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting events, and wait for the worker to handle those already queued.
+        
+        Args:
+            timeout: Longest time to wait for the worker, in seconds (None to wait indefinitely)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+
 def stop_file_watcher() -> None:
     """
     Stop the file watcher.
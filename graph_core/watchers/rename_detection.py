@@ -8,13 +8,18 @@ by comparing file content similarity.
 import os
 import logging
 import difflib
+import functools
 import hashlib
+import threading
 from typing import List, Dict, Set, Tuple, NamedTuple, Union, Optional, Any
 from pathlib import Path
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Guards the shared matchers returned by _body_matcher
+_body_matcher_lock = threading.Lock()
+
 class RenameEvent(NamedTuple):
     """Represents a file rename event."""
     old_path: str
@@ -81,6 +86,47 @@ def calculate_similarity(file1: str, file2: str) -> float:
         return 0.0
 
 
+@functools.lru_cache(maxsize=256)
+def _body_matcher(body: str) -> difflib.SequenceMatcher:
+    """
+    Get a SequenceMatcher with body set as its second sequence.
+    
+    SequenceMatcher indexes its second sequence when it is set, so keeping one
+    matcher per new body avoids re-indexing it for every old function it is
+    compared against.
+    
+    Args:
+        body: Body of the function in the new version of the file
+        
+    Returns:
+        A SequenceMatcher whose first sequence is set by the caller
+    """
+    return difflib.SequenceMatcher(None, '', body)
+
+
+@functools.lru_cache(maxsize=1024)
+def _body_similarity(old_body: str, new_body: str) -> float:
+    """
+    Calculate the similarity ratio of two function bodies.
+    
+    Results are cached, since the manager compares the same unchanged bodies
+    every time a file is modified.
+    
+    Args:
+        old_body: Body of the function in the old version of the file
+        new_body: Body of the function in the new version of the file
+        
+    Returns:
+        Similarity ratio between 0.0 and 1.0
+    """
+    if old_body == new_body:
+        return 1.0
+    with _body_matcher_lock:
+        matcher = _body_matcher(new_body)
+        matcher.set_seq1(old_body)
+        return matcher.ratio()
+
+
 def match_functions(
     old_ast: Dict[str, List[Dict[str, Any]]], 
     new_ast: Dict[str, List[Dict[str, Any]]], 
@@ -146,8 +192,7 @@ def match_functions(
             # Calculate similarity based on:
             # 1. Function body similarity if available
             if new_body and old_body:
-                # Use SequenceMatcher to compare function bodies
-                body_similarity = difflib.SequenceMatcher(None, old_body, new_body).ratio()
+                body_similarity = _body_similarity(old_body, new_body)
             else:
                 body_similarity = 0.0
             
@@ -21,7 +21,7 @@ from fastapi.responses import RedirectResponse
 
 from graph_core.storage.in_memory import InMemoryGraphStorage
 from graph_core.manager import DependencyGraphManager
-from graph_core.watchers.file_watcher import start_file_watcher
+from graph_core.watchers.file_watcher import start_bulk_file_watcher
 from graph_core.api import create_app
 
 # Set up logging
@@ -77,9 +77,10 @@ def start_watcher(manager, watch_dir):
                     manager.on_file_event('created', filepath)
         
         # Start watching for changes
-        start_file_watcher(
-            callback=manager.on_file_event,
-            watch_dir=watch_dir
+        start_bulk_file_watcher(
+            callback=manager.on_file_events_bulk,
+            watch_dir=watch_dir,
+            suffixes=supported_extensions
         )
     except Exception as e:
         logger.exception(f"Error in file watcher: {str(e)}")
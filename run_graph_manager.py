@@ -22,7 +22,7 @@ from typing import Callable, Optional
 import uvicorn
 from graph_core import DependencyGraphManager, create_app
 from graph_core.storage.in_memory import InMemoryGraphStorage
-from graph_core.watchers.file_watcher import start_file_watcher
+from graph_core.watchers.file_watcher import start_file_watcher, WatcherDispatcher
 
 # Set up logging
 logging.basicConfig(
@@ -50,10 +50,12 @@ def start_watcher(callback: Callable[[str, str], None], watch_dir: str) -> threa
     if not os.path.exists(watch_dir):
         raise FileNotFoundError(f"Watch directory not found: {watch_dir}")
     
-    # Create and start the watcher thread
+    # Create and start the watcher thread; events are handled on the dispatcher's own
+    # thread, so slow parsing doesn't hold up the watcher
     watcher_thread = threading.Thread(
         target=start_file_watcher,
-        args=(callback, watch_dir),
+        args=(WatcherDispatcher(callback), watch_dir),
+        kwargs={'suffixes': DependencyGraphManager.SUPPORTED_EXTENSIONS},
         daemon=True  # Make thread exit when main thread exits
     )
     watcher_thread.start()
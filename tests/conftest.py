@@ -0,0 +1,15 @@
+"""
+Shared pytest configuration for the test suite.
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path once for every test module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def pytest_configure(config):
+    """Register the markers used by the test suite."""
+    config.addinivalue_line(
+        "markers", "slow: end-to-end tests that go through the real import machinery"
+    )
@@ -2,735 +2,1174 @@
 Tests for the dependency_graph_manager module.
 """
 
+import io
 import os
-import tempfile
-import unittest
+import sys
+import threading
+import time
 import json
+from contextlib import ExitStack
+import pytest
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock, call, mock_open
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import Mock, patch
 import networkx as nx
 
+import graph_core.manager as manager_module
 from graph_core.manager import DependencyGraphManager, DEFAULT_JSON_PATH
 from graph_core.storage.in_memory import InMemoryGraphStorage
 from graph_core.storage.json_storage import JSONGraphStorage, calculate_content_hash
 from graph_core.dynamic.import_hook import FunctionCallEvent
 
+# Function call events are only read by the manager, so they can be shared across tests.
+# The manager only reads their attributes; test_function_call_event_contract pins those on the real class.
+_EVENT_TEST_FUNC = SimpleNamespace(module_name='test_module', function_name='test_func', filename='test_file.py')
+_EVENT_NESTED_FUNC = SimpleNamespace(module_name='test_module', function_name='nested.func', filename='test_file.py')
+_EVENT_SIMPLE = SimpleNamespace(module_name='test_module', function_name='simple_func', filename='test_file.py')
+_EVENT_NESTED = SimpleNamespace(module_name='test_module', function_name='outer_func.inner_func', filename='test_file.py')
 
-class TestDependencyGraphManager(unittest.TestCase):
-    """Test cases for the DependencyGraphManager class."""
-    
-    def setUp(self):
-        """Set up the test environment."""
-        self.storage = Mock(spec=InMemoryGraphStorage)
-        # Add file_nodes attribute to mock to support the new functionality
-        self.storage.file_nodes = {}
-        self.manager = DependencyGraphManager(self.storage)
-    
-    def test_init(self):
-        """Test initialization of DependencyGraphManager."""
-        self.assertEqual(self.manager.storage, self.storage)
-        self.assertEqual(self.manager.SUPPORTED_EXTENSIONS, ['.py', '.js', '.ts', '.tsx'])
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content')
-    @patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr)
-    def test_on_file_event_created(self, mock_scan_secrets, mock_file_open, mock_get_parser):
-        """Test handling a 'created' file event for a Python file."""
-        mock_parser = Mock()
-        parse_result = {
-            'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': 'test.py'}],
-            'edges': []
-        }
-        mock_parser.parse_file.return_value = parse_result
-        mock_get_parser.return_value = mock_parser
-        filepath = 'test.py'
-        self.manager.on_file_event('created', filepath)
-        mock_file_open.assert_called_once_with(filepath, 'rb')
-        mock_get_parser.assert_called_once_with(filepath)
-        mock_parser.parse_file.assert_called_once_with(filepath)
-        mock_scan_secrets.assert_called_once()
-        self.storage.add_or_update_file.assert_called_once()
-        args, kwargs = self.storage.add_or_update_file.call_args
-        self.assertEqual(args[0], filepath)
-        self.assertIn('content_hash', kwargs)
-        self.assertIsNotNone(kwargs['content_hash'])
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content_js')
-    @patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr)
-    def test_on_file_event_created_javascript(self, mock_scan_secrets, mock_file_open, mock_get_parser):
-        """Test handling a 'created' file event for a JavaScript file."""
-        mock_parser = Mock()
-        parse_result = {
-            'nodes': [{'id': 'module:test.js', 'type': 'module', 'name': 'test.js', 'filepath': 'test.js'}],
-            'edges': []
-        }
-        mock_parser.parse_file.return_value = parse_result
-        mock_get_parser.return_value = mock_parser
-        filepath = 'test.js'
-        self.manager.on_file_event('created', filepath)
-        mock_file_open.assert_called_once_with(filepath, 'rb')
-        mock_get_parser.assert_called_once_with(filepath)
-        mock_parser.parse_file.assert_called_once_with(filepath)
-        mock_scan_secrets.assert_called_once()
-        self.storage.add_or_update_file.assert_called_once()
-        args, kwargs = self.storage.add_or_update_file.call_args
-        self.assertIn('content_hash', kwargs)
-        self.assertIsNotNone(kwargs['content_hash'])
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content')
-    @patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr)
-    @patch('graph_core.manager.DependencyGraphManager.update_function_names', return_value={})
-    def test_on_file_event_modified(self, mock_update_names, mock_scan_secrets, mock_file_open, mock_get_parser):
-        """Test handling a 'modified' file event for a Python file."""
-        mock_parser = Mock()
-        parse_result = {
-            'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': 'test.py'}],
-            'edges': []
-        }
-        mock_parser.parse_file.return_value = parse_result
-        mock_get_parser.return_value = mock_parser
-        filepath = 'test.py'
-        self.manager.on_file_event('modified', filepath)
-        mock_file_open.assert_called_once_with(filepath, 'rb')
-        mock_get_parser.assert_called_once_with(filepath)
-        mock_parser.parse_file.assert_called_once_with(filepath)
-        mock_scan_secrets.assert_called_once()
-        self.storage.add_or_update_file.assert_called_once()
-        args, kwargs = self.storage.add_or_update_file.call_args
-        self.assertEqual(args[0], filepath)
-        self.assertIn('content_hash', kwargs)
-        self.assertIsNotNone(kwargs['content_hash'])
-    
-    def test_on_file_event_deleted(self):
-        """Test handling a 'deleted' file event for a Python file."""
-        filepath = 'test.py'
-        self.manager.on_file_event('deleted', filepath)
-        
-        # Verify the storage was updated
-        self.storage.remove_file.assert_called_once_with(filepath)
-    
-    def test_on_file_event_unsupported_file(self):
-        """Test handling a file event for an unsupported file type."""
-        filepath = 'test.txt'
-        self.manager.on_file_event('created', filepath)
-        
-        # Verify the storage was not updated
-        self.storage.add_or_update_file.assert_not_called()
-        self.storage.remove_file.assert_not_called()
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    def test_on_file_event_no_parser(self, mock_get_parser):
-        """Test handling a file event when no parser is available."""
-        # Set up mocks
-        mock_get_parser.return_value = None
-        
-        # Call the method
-        filepath = 'test.py'
-        self.manager.on_file_event('created', filepath)
-        
-        # Verify the storage was not updated
-        self.storage.add_or_update_file.assert_not_called()
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    def test_on_file_event_file_not_found(self, mock_get_parser):
-        """Test handling a file event when the file is not found."""
-        # Set up mocks
-        mock_parser = Mock()
-        mock_parser.parse_file.side_effect = FileNotFoundError()
-        mock_get_parser.return_value = mock_parser
-        
-        # Call the method - should not raise an exception
-        filepath = 'nonexistent.py'
-        self.manager.on_file_event('created', filepath)
-        
-        # Verify the storage was not updated
-        self.storage.add_or_update_file.assert_not_called()
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    def test_on_file_event_permission_error(self, mock_get_parser):
-        """Test handling a file event when there's a permission error."""
-        # Set up mocks
-        mock_parser = Mock()
-        mock_parser.parse_file.side_effect = PermissionError()
-        mock_get_parser.return_value = mock_parser
-        
-        # Call the method - should not raise an exception
-        filepath = 'protected.py'
-        self.manager.on_file_event('created', filepath)
-        
-        # Verify the storage was not updated
-        self.storage.add_or_update_file.assert_not_called()
-    
-    def test_on_file_event_invalid_type(self):
-        """Test handling a file event with an invalid event type."""
-        manager = DependencyGraphManager()
-        manager.on_file_event('invalid', 'test.py')
-        # Instead of raising an error, the method should log a warning and continue
-        # We're just asserting that the method runs without exception
-        self.assertTrue(True)  # If we got here, the test passes
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('os.path.exists')
-    @patch('os.path.isdir')
-    @patch('os.walk')
-    def test_process_existing_files(self, mock_walk, mock_isdir, mock_exists, mock_get_parser):
-        """Test processing existing files in a directory."""
-        # Set up mocks
-        mock_exists.return_value = True
-        mock_isdir.return_value = True
-        
-        # Use os.path.join to make paths OS-independent
-        root_dir = os.path.normpath('/test')
-        subdir = os.path.join(root_dir, 'subdir')
-        
-        mock_walk.return_value = [
-            (root_dir, ['subdir'], ['test1.py', 'test2.js', 'test3.txt']),
-            (subdir, [], ['test4.ts', 'test5.tsx', 'test6.md'])
-        ]
-        
-        mock_parser = Mock()
-        mock_parser.parse_file.return_value = {
-            'nodes': [{'id': 'test_func', 'type': 'function', 'name': 'test_func'}],
-            'edges': []
-        }
-        mock_get_parser.return_value = mock_parser
-        
-        # Call the method
-        result = self.manager.process_existing_files(root_dir)
-        
-        # Verify the result
-        self.assertEqual(result, 4)  # 4 supported files
-        
-        # Verify parser calls
-        self.assertEqual(mock_get_parser.call_count, 4)
-        
-        # Use os.path.join to create the expected paths
-        file1 = os.path.join(root_dir, 'test1.py')
-        file2 = os.path.join(root_dir, 'test2.js')
-        file3 = os.path.join(subdir, 'test4.ts')
-        file4 = os.path.join(subdir, 'test5.tsx')
-        
-        mock_get_parser.assert_any_call(file1)
-        mock_get_parser.assert_any_call(file2)
-        mock_get_parser.assert_any_call(file3)
-        mock_get_parser.assert_any_call(file4)
-        
-        # Verify storage updates
-        self.assertEqual(self.storage.add_or_update_file.call_count, 4)
-    
-    @patch('os.path.exists')
-    def test_process_existing_files_directory_not_found(self, mock_exists):
-        """Test processing files when the directory doesn't exist."""
-        mock_exists.return_value = False
-        
-        with self.assertRaises(FileNotFoundError):
-            self.manager.process_existing_files('/nonexistent')
-    
-    @patch('os.path.exists')
-    @patch('os.path.isdir')
-    def test_process_existing_files_not_a_directory(self, mock_isdir, mock_exists):
-        """Test processing files when the target is not a directory."""
-        # Set up mocks
-        mock_exists.return_value = True
-        mock_isdir.return_value = False
-        
-        with self.assertRaises(ValueError):
-            self.manager.process_existing_files('/test/not_a_dir')
-    
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content')
-    def test_integration_with_watcher(self, mock_file_open, mock_get_parser):
-        """Test integration with file watcher by simulating watcher events."""
-        # Set up mocks
-        mock_parser = Mock()
-        parse_result = {
-            'nodes': [{'id': 'test_func', 'type': 'function', 'name': 'test_func'}],
-            'edges': []
-        }
-        mock_parser.parse_file.return_value = parse_result
-        mock_get_parser.return_value = mock_parser
-
-        # Create a mock file watcher
-        mock_watcher_callback = None
-
-        def start_mock_watcher(callback, watch_dir='src'):
-            nonlocal mock_watcher_callback
-            mock_watcher_callback = callback
-            return None
-
-        # Simulate a file watcher starting and sending events
-        start_mock_watcher(self.manager.on_file_event)
-
-        # Mock storage hash check for modification
-        self.storage.get_file_content_hash.return_value = "old_hash"
-        # Mock storage file tracking needed for modification
-        self.storage.file_nodes = {'test2.js': {'some_node_id'}}
-        self.storage.get_node.return_value = {'id': 'some_node_id', 'content_hash': 'old_hash'}
-
-        # Simulate file events within a context that mocks secrets/renames
-        with patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr):
-            with patch('graph_core.manager.DependencyGraphManager.update_function_names', return_value={}):
-                mock_watcher_callback('created', 'test1.py')
-                mock_watcher_callback('modified', 'test2.js')
-                mock_watcher_callback('deleted', 'test3.ts')
-                mock_watcher_callback('created', 'test4.txt')  # Unsupported
-
-        # Verify the storage was updated correctly
-        # Both created (test1.py) and modified (test2.js) should call add_or_update_file
-        self.assertEqual(self.storage.add_or_update_file.call_count, 2)
-        self.assertEqual(self.storage.remove_file.call_count, 1)
-
-        # Check the call arguments specifically for the modified file
-        found_modified_call = False
-        for call_args in self.storage.add_or_update_file.call_args_list:
-            args, kwargs = call_args
-            if args[0] == 'test2.js':
-                found_modified_call = True
-                self.assertIn('content_hash', kwargs)
-                self.assertNotEqual(kwargs['content_hash'], "old_hash")
-                break
-        self.assertTrue(found_modified_call, "Call for modified file 'test2.js' not found")
-
-        self.storage.remove_file.assert_called_once_with('test3.ts')
-    
-    @patch('graph_core.manager.initialize_hook')
-    @patch('threading.Thread')
-    def test_start_python_instrumentation(self, mock_thread_class, mock_initialize_hook):
-        """Test starting Python instrumentation."""
-        # Set up mock thread
-        mock_thread = Mock()
-        mock_thread_class.return_value = mock_thread
-        
-        # Call the method with all parameters
-        watch_dir = 'src/test_dir'
-        poll_interval = 0.75
-        exclude_patterns = ['test_', 'excluded']
-        include_patterns = ['main', 'core']
-        cache_dir = '/tmp/test_cache'
-        
-        self.manager.start_python_instrumentation(
-            watch_dir=watch_dir,
-            poll_interval=poll_interval,
-            exclude_patterns=exclude_patterns,
-            include_patterns=include_patterns,
-            cache_dir=cache_dir
-        )
-        
-        # Verify initialize_hook was called with the correct parameters
-        expected_dir = os.path.abspath(watch_dir)
-        mock_initialize_hook.assert_called_once_with(
-            expected_dir,
-            exclude_patterns=exclude_patterns,
-            include_patterns=include_patterns,
-            cache_dir=cache_dir
-        )
-        
-        # Verify the thread was created and started
-        mock_thread_class.assert_called_once()
-        self.assertEqual(mock_thread_class.call_args[1]['target'], self.manager._process_function_call_events)
-        self.assertTrue(mock_thread_class.call_args[1]['daemon'])
-        mock_thread.start.assert_called_once()
-        
-        # Verify instance variables were set correctly
-        self.assertTrue(self.manager.instrumentation_active)
-        self.assertEqual(self.manager.instrumentation_thread, mock_thread)
-        self.assertEqual(self.manager.instrumentation_watch_dir, expected_dir)
-        self.assertEqual(self.manager.instrumentation_poll_interval, poll_interval)
-        self.assertEqual(self.manager.exclude_patterns, exclude_patterns)
-        self.assertEqual(self.manager.include_patterns, include_patterns)
-        self.assertEqual(self.manager.cache_dir, cache_dir)
-    
-    @patch('graph_core.manager.initialize_hook')
-    @patch('threading.Thread')
-    def test_start_python_instrumentation_already_active(self, mock_thread_class, mock_initialize_hook):
-        """Test starting Python instrumentation when it's already active."""
-        # Simulate already active instrumentation
-        self.manager.instrumentation_active = True
-        
-        # Call the method
-        self.manager.start_python_instrumentation()
-        
-        # Verify initialize_hook was not called
-        mock_initialize_hook.assert_not_called()
-        
-        # Verify the thread was not created
-        mock_thread_class.assert_not_called()
-    
-    @patch('threading.Thread')
-    def test_stop_python_instrumentation(self, mock_thread_class):
-        """Test stopping Python instrumentation."""
-        # Set up for active instrumentation
-        mock_thread = Mock()
-        mock_thread.is_alive.return_value = True
-        self.manager.instrumentation_active = True
-        self.manager.instrumentation_thread = mock_thread
-        
-        # Call the method
-        self.manager.stop_python_instrumentation()
-        
-        # Verify thread was joined
-        mock_thread.join.assert_called_once_with(timeout=2.0)
-        
-        # Verify instance variable was updated
-        self.assertFalse(self.manager.instrumentation_active)
-    
-    def test_stop_python_instrumentation_not_active(self):
-        """Test stopping Python instrumentation when it's not active."""
-        # Ensure instrumentation is not active
-        self.manager.instrumentation_active = False
-        
-        # Call the method
-        self.manager.stop_python_instrumentation()
-        
-        # No assertions needed - just verify no exceptions
-    
-    @patch('graph_core.manager.get_function_calls')
-    @patch('time.sleep')
-    def test_process_function_call_events(self, mock_sleep, mock_get_function_calls):
-        """Test processing function call events from the queue."""
-        # Set up mocks
-        event1 = FunctionCallEvent(module_name='test_module', function_name='test_func', filename='test_file.py')
-        event2 = FunctionCallEvent(module_name='test_module', function_name='nested.func', filename='test_file.py')
-        
-        # Configure mock to return events once, then empty list to break the loop
-        mock_get_function_calls.side_effect = [[event1, event2], []]
-        
-        # Create a spy for _process_function_call_event
-        self.manager._process_function_call_event = Mock()
-        
-        # Set up to run only for one loop
-        self.manager.instrumentation_active = True
-        
-        def stop_after_first_call(*args, **kwargs):
-            self.manager.instrumentation_active = False
-        
-        mock_sleep.side_effect = stop_after_first_call
-        
-        # Call the method
-        self.manager._process_function_call_events()
-        
-        # Verify events were processed
-        self.manager._process_function_call_event.assert_has_calls([
-            call(event1),
-            call(event2)
-        ])
-        
-        # Verify sleep was called with the correct interval
-        mock_sleep.assert_called_once_with(self.manager.instrumentation_poll_interval)
-    
-    def test_process_function_call_event(self):
-        """Test processing a single function call event."""
-        # Set up a real instance with a mocked storage
-        real_storage = Mock(spec=InMemoryGraphStorage)
-        manager = DependencyGraphManager(real_storage)
-        
-        # Mock the necessary methods
-        manager.update_function_call_count = Mock()
-        manager.process_dynamic_event = Mock()
-        
-        # Create test events
-        event1 = FunctionCallEvent(module_name='test_module', function_name='simple_func', filename='test_file.py')
-        event2 = FunctionCallEvent(module_name='test_module', function_name='outer_func.inner_func', filename='test_file.py')
-        
-        # Process the simple function event
-        manager._process_function_call_event(event1)
-        
-        # Verify the function call count was updated
-        manager.update_function_call_count.assert_called_once_with('function:test_module.simple_func')
-        manager.process_dynamic_event.assert_not_called()
-        
-        # Reset mocks
-        manager.update_function_call_count.reset_mock()
-        manager.process_dynamic_event.reset_mock()
-        
-        # Process the nested function event
-        manager._process_function_call_event(event2)
-        
-        # Verify both the function call count and dynamic event were processed
-        manager.update_function_call_count.assert_called_once_with('function:test_module.inner_func')
-        manager.process_dynamic_event.assert_called_once_with(
-            'call', 'function:test_module.outer_func', 'function:test_module.inner_func'
-        )
-    
-    @patch('graph_core.dynamic.import_hook.clear_transformation_cache')
-    def test_clear_instrumentation_cache(self, mock_clear_cache):
-        """Test clearing the instrumentation cache."""
-        # Set a cache directory
-        cache_dir = '/tmp/test_cache'
-        self.manager.cache_dir = cache_dir
-        
-        # Call the method
-        self.manager.clear_instrumentation_cache()
-        
-        # Verify the cache was cleared with the correct path
-        mock_clear_cache.assert_called_once_with(cache_dir)
-    
-    @patch('time.time')
-    def test_detect_renames(self, mock_time):
-        """Test detection of renamed files."""
-        # Set up mock time
-        mock_time.return_value = 100.0
-        
-        # Add some deleted and created files to the buffers
-        self.manager.deleted_files.append((99.0, 'old_file.py'))
-        self.manager.created_files.append((99.5, 'new_file.py'))
-        
-        # Patch the detect_renames function to return a rename event
-        with patch('graph_core.manager.detect_renames') as mock_detect_renames:
-            mock_detect_renames.return_value = [
-                MagicMock(
-                    old_path='old_file.py',
-                    new_path='new_file.py'
+# Read-only parser results shared by the tests that don't expect the manager to mutate them
+_PARSE_RESULT_PY = MappingProxyType({
+    'nodes': ({'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': 'test.py'},),
+    'edges': ()
+})
+_PARSE_RESULT_JS = MappingProxyType({
+    'nodes': ({'id': 'module:test.js', 'type': 'module', 'name': 'test.js', 'filepath': 'test.js'},),
+    'edges': ()
+})
+_PARSE_RESULT_FUNC = MappingProxyType({
+    'nodes': ({'id': 'test_func', 'type': 'function', 'name': 'test_func'},),
+    'edges': ()
+})
+_PARSE_RESULT_ANOTHER = MappingProxyType({
+    'nodes': (
+        {'id': 'function:test_func', 'type': 'function', 'name': 'test_func'},
+        {'id': 'module:another_file.py', 'type': 'module', 'name': 'another_file.py', 'filepath': 'another_file.py'},  # Module for hashing
+    ),
+    'edges': ()
+})
+
+# Directory tree walked by test_process_existing_files, and a parse result per supported file
+_WALK_ROOT = os.path.normpath('/test')
+_WALK_SUBDIR = os.path.join(_WALK_ROOT, 'subdir')
+_WALK_RESULT = (
+    (_WALK_ROOT, ['subdir'], ['test1.py', 'test2.js', 'test3.txt']),
+    (_WALK_SUBDIR, [], ['test4.ts', 'test5.tsx', 'test6.md']),
+)
+_WALKED_FILES = frozenset({
+    os.path.join(_WALK_ROOT, 'test1.py'),
+    os.path.join(_WALK_ROOT, 'test2.js'),
+    os.path.join(_WALK_SUBDIR, 'test4.ts'),
+    os.path.join(_WALK_SUBDIR, 'test5.tsx'),
+})
+# Module nodes are needed in the parse results for hash storage
+_WALKED_PARSE_RESULTS = MappingProxyType({
+    filepath: MappingProxyType({
+        'nodes': ({'id': f"module:{os.path.basename(filepath)}", 'type': 'module',
+                   'name': os.path.basename(filepath), 'filepath': filepath},),
+        'edges': ()
+    })
+    for filepath in _WALKED_FILES
+})
+
+# Content hash returned by the patched calculate_file_hash; the unit tests never check real digests
+_FAKE_CONTENT_HASH = 'deadbeef' * 8
+
+# Node attributes expected after update_node_filepath('old_file.py', 'new_file.py')
+_EXPECTED_UPDATED_NODES = MappingProxyType({
+    'node1': {'filepath': 'new_file.py', 'name': 'Test Node 1', 'rename_history': ['old_file.py']},
+    'node2': {'filepath': 'new_file.py', 'name': 'Test Node 2', 'rename_history': ['old_file.py']},
+})
+
+
+class _FakeStorage:
+    """Storage stand-in exposing only what the manager uses, recording writes in plain lists."""
+
+    __slots__ = ('file_nodes', 'graph', 'nodes', 'content_hash', 'add_calls', 'remove_calls')
+
+    def __init__(self):
+        self.file_nodes = {}
+        self.graph = nx.MultiDiGraph()
+        self.nodes = {}
+        self.content_hash = None
+        self.add_calls = []
+        self.remove_calls = []
+
+    def reset(self):
+        """Return the storage to its freshly constructed state."""
+        self.file_nodes = {}
+        self.graph.clear()
+        self.nodes = {}
+        self.content_hash = None
+        self.add_calls.clear()
+        self.remove_calls.clear()
+
+    def add_or_update_file(self, filepath, parse_result, content_hash=None):
+        self.add_calls.append((filepath, parse_result, content_hash))
+
+    def remove_file(self, filepath):
+        self.remove_calls.append(filepath)
+
+    def get_file_content_hash(self, filepath):
+        return self.content_hash
+
+    def get_node(self, node_id):
+        node = self.nodes.get(node_id)
+        return dict(node) if node is not None else None
+
+
+class _FakeFS:
+    """Filesystem stand-in for process_existing_files, serving one directory tree from memory."""
+
+    def __init__(self, walk_result=(), exists: bool = True, isdir: bool = True):
+        self._walk_result = walk_result
+        self._exists = exists
+        self._isdir = isdir
+
+    def exists(self, path) -> bool:
+        return self._exists
+
+    def isdir(self, path) -> bool:
+        return self._isdir
+
+    def scandir(self, path):
+        """List one directory of the tree as entries whose stat() needs no real file."""
+        for root, dirs, files in self._walk_result:
+            if root == path:
+                return _FakeScandirIterator(
+                    [_FakeDirEntry(root, name, is_dir=True) for name in dirs] +
+                    [_FakeDirEntry(root, name, is_dir=False) for name in files]
                 )
-            ]
-            
-            # Call detect_renames
-            result = self.manager.detect_renames()
-            
-            # Verify the results
-            self.assertEqual(len(result), 1)
-            self.assertEqual(result[0].old_path, 'old_file.py')
-            self.assertEqual(result[0].new_path, 'new_file.py')
-            
-            # Verify the deleted and created files were removed from the buffers
-            self.assertEqual(len(self.manager.deleted_files), 0)
-            self.assertEqual(len(self.manager.created_files), 0)
-            
-            # Verify the rename history was updated
-            self.assertEqual(self.manager.rename_history['new_file.py'], 'old_file.py')
-    
-    def test_update_node_filepath(self):
-        """Test updating the filepath property of nodes."""
-        # Set up test data
-        old_path = 'old_file.py'
-        new_path = 'new_file.py'
-        
-        # Mock the storage and its graph property
-        self.storage.file_nodes = {old_path: {'node1', 'node2'}}
-        self.storage.graph = Mock()
-        
-        # Mock get_node to return a node
-        self.storage.get_node.side_effect = lambda node_id: {
-            'node1': {'id': 'node1', 'filepath': old_path, 'name': 'Test Node 1'},
-            'node2': {'id': 'node2', 'filepath': old_path, 'name': 'Test Node 2'}
-        }.get(node_id)
-        
-        # Call update_node_filepath
-        result = self.manager.update_node_filepath(old_path, new_path)
-        
-        # Verify the result
-        self.assertTrue(result)
-        
-        # Verify node updates
-        expected_calls = [
-            call('node1', **{'filepath': new_path, 'name': 'Test Node 1', 'rename_history': [old_path]}),
-            call('node2', **{'filepath': new_path, 'name': 'Test Node 2', 'rename_history': [old_path]})
-        ]
-        self.storage.graph.add_node.assert_has_calls(expected_calls, any_order=True)
-        
-        # Verify file_nodes updates
-        self.assertIn(new_path, self.storage.file_nodes)
-        self.assertNotIn(old_path, self.storage.file_nodes)
-        self.assertEqual(self.storage.file_nodes[new_path], {'node1', 'node2'})
-        
-        # Verify rename history was updated
-        self.assertEqual(self.manager.rename_history[new_path], old_path)
-    
-    def test_update_node_filepath_nonexistent_file(self):
-        """Test updating the filepath property of nodes for a nonexistent file."""
-        # Set up test data
-        old_path = 'nonexistent.py'
-        new_path = 'new_file.py'
-        
-        # Mock the storage without the old file
-        self.storage.file_nodes = {}
-        self.storage.graph = Mock()
-        
-        # Call update_node_filepath
-        result = self.manager.update_node_filepath(old_path, new_path)
-        
-        # Verify the result
-        self.assertFalse(result)
-        
-        # Verify no nodes were updated
-        self.storage.graph.add_node.assert_not_called()
-        
-        # Verify rename history was not updated
-        self.assertNotIn(new_path, self.manager.rename_history)
-    
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content')
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('graph_core.manager.DependencyGraphManager.detect_renames')
-    @patch('graph_core.manager.DependencyGraphManager.update_node_filepath')
-    @patch('graph_core.manager.scan_parse_result_for_secrets')
-    def test_on_file_event_with_rename_detection(self, mock_scan, mock_update_node, mock_detect_renames, mock_get_parser, mock_file_open):
-        """Test handling file events with rename detection."""
-        mock_parser = Mock()
-        parse_result = {
-            'nodes': [
-                {'id': 'function:test_func', 'type': 'function', 'name': 'test_func'},
-                {'id': 'module:another_file.py', 'type': 'module', 'name': 'another_file.py', 'filepath': 'another_file.py'} # Module for hashing
-                ],
-            'edges': []
-        }
-        mock_parser.parse_file.return_value = parse_result
-        mock_get_parser.return_value = mock_parser
-
-        # --- Test Deletion with Rename ---
-        mock_detect_renames.return_value = [MagicMock(old_path='old_file.py', new_path='new_file.py')]
-        self.manager.on_file_event('deleted', 'old_file.py')
-        mock_detect_renames.assert_called() # Ensure rename detection was checked
-        self.storage.remove_file.assert_not_called() # File removal should be skipped
-        # Reset mocks for next part
-        mock_file_open.reset_mock()
-        mock_get_parser.reset_mock()
-        mock_scan.reset_mock()
-        mock_update_node.reset_mock()
-        self.storage.reset_mock()
-
-        # --- Test Creation with Rename ---
-        mock_detect_renames.reset_mock()
-        mock_detect_renames.return_value = [MagicMock(old_path='old_file.py', new_path='new_file.py')]
-        self.manager.on_file_event('created', 'new_file.py')
-        mock_detect_renames.assert_called() # Rename detection checked again
-        mock_update_node.assert_called_with('old_file.py', 'new_file.py')
-        # Parsing and adding should be skipped
-        mock_file_open.assert_not_called() # No open needed if renamed
-        mock_get_parser.assert_not_called()
-        mock_scan.assert_not_called()
-        self.storage.add_or_update_file.assert_not_called()
-        mock_update_node.reset_mock()
-        mock_detect_renames.reset_mock()
-
-        # --- Test Creation without Rename ---
-        mock_detect_renames.return_value = [] # Simulate no rename detected
-        self.manager.on_file_event('created', 'another_file.py')
-        mock_detect_renames.assert_called()
-        mock_update_node.assert_not_called() # update_node_filepath shouldn't be called
-        # File should be opened, parsed, scanned, and added
-        mock_file_open.assert_called_with('another_file.py', 'rb') # Opened for hashing
-        mock_get_parser.assert_called_with('another_file.py')
-        mock_parser.parse_file.assert_called_with('another_file.py')
-        mock_scan.assert_called() # Secrets scan should run
-        self.storage.add_or_update_file.assert_called() # Add should be called
-
-    @patch('builtins.open', new_callable=mock_open, read_data=b'content')
-    @patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr)
-    @patch('graph_core.manager.get_parser_for_file')
-    @patch('os.path.exists')
-    @patch('os.path.isdir')
-    @patch('os.walk')
-    def test_process_existing_files(self, mock_walk, mock_isdir, mock_exists, mock_get_parser, mock_scan_secrets, mock_file_open):
-        """Test processing existing files in a directory."""
-        # Set up mocks
-        mock_exists.return_value = True
-        mock_isdir.return_value = True
-        
-        # Use os.path.join to make paths OS-independent
-        root_dir = os.path.normpath('/test')
-        subdir = os.path.join(root_dir, 'subdir')
-        
-        mock_walk.return_value = [
-            (root_dir, ['subdir'], ['test1.py', 'test2.js', 'test3.txt']),
-            (subdir, [], ['test4.ts', 'test5.tsx', 'test6.md'])
+        raise FileNotFoundError(path)
+
+
+class _FakeDirEntry:
+    """os.DirEntry stand-in for _FakeFS, with a fixed stat result."""
+
+    STAT = SimpleNamespace(st_mtime_ns=1_000_000_000, st_size=7)
+
+    def __init__(self, root: str, name: str, is_dir: bool):
+        self.name = name
+        self.path = os.path.join(root, name)
+        self._is_dir = is_dir
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._is_dir
+
+    def stat(self):
+        return self.STAT
+
+
+class _FakeScandirIterator(list):
+    """List of entries usable as a context manager, like the iterator os.scandir returns."""
+
+    def __enter__(self):
+        return iter(self)
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _bytes_opener(data: bytes):
+    """Build an open() replacement that serves data from an in-memory buffer."""
+    return lambda *args, **kwargs: io.BytesIO(data)
+
+
+class _StaticParser:
+    """Parser stand-in that returns a fixed result and records the files it parsed."""
+
+    def __init__(self, result):
+        self.result = result
+        self.parsed = []
+
+    def parse_file(self, filepath: str):
+        self.parsed.append(filepath)
+        return self.result
+
+
+class _RaisingParser:
+    """Parser stand-in whose parse_file always raises the given exception."""
+
+    def __init__(self, exc: Exception):
+        self._exc = exc
+
+    def parse_file(self, filepath: str):
+        raise self._exc
+
+
+class _StubbedManager(DependencyGraphManager):
+    """Manager with canned rename detection that records filepath updates."""
+
+    def __init__(self, storage):
+        super().__init__(storage)
+        self.rename_events = []
+        self.detect_renames_calls = 0
+        self.filepath_updates = []
+
+    def detect_renames(self):
+        self.detect_renames_calls += 1
+        return self.rename_events
+
+    def update_node_filepath(self, old_path, new_path):
+        self.filepath_updates.append((old_path, new_path))
+        return True
+
+
+class _Patcher:
+    """Starts patches for one test; they are undone when the test finishes."""
+
+    def __init__(self, stack: ExitStack):
+        self._stack = stack
+
+    def patch(self, target, **kwargs):
+        """Patch target and return the mock."""
+        return self._stack.enter_context(patch(target, **kwargs))
+
+    def object(self, target, attribute, **kwargs):
+        """Patch an attribute of target and return the mock."""
+        return self._stack.enter_context(patch.object(target, attribute, **kwargs))
+
+    def filesystem(self, fs):
+        """Route os.path.exists, os.path.isdir and os.scandir to fs."""
+        self._stack.enter_context(patch.multiple(os.path, exists=fs.exists, isdir=fs.isdir))
+        self._stack.enter_context(patch.object(os, 'scandir', fs.scandir))
+
+
+@pytest.fixture(scope='module')
+def shared_storage():
+    """Create one fake storage shared by every test in the module."""
+    return _FakeStorage()
+
+
+@pytest.fixture
+def storage(shared_storage):
+    """Return the shared storage in its freshly constructed state."""
+    shared_storage.reset()
+    return shared_storage
+
+
+@pytest.fixture
+def primed_storage(storage):
+    """Prime the storage for hash checks on test2.js."""
+    storage.content_hash = "old_hash"
+    storage.file_nodes = {'test2.js': {'some_node_id'}}
+    storage.nodes = {'some_node_id': {'id': 'some_node_id', 'content_hash': 'old_hash'}}
+    return storage
+
+
+@pytest.fixture
+def manager(storage):
+    """Create a manager backed by the fake storage."""
+    return DependencyGraphManager(storage)
+
+
+@pytest.fixture
+def patcher():
+    """Patch things for the duration of one test."""
+    with ExitStack() as stack:
+        yield _Patcher(stack)
+
+
+@pytest.fixture
+def mock_get_parser():
+    """Patch the manager's parser lookup."""
+    with patch.object(manager_module, 'get_parser_for_file') as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_scan_secrets():
+    """Patch secret scanning to hand the parse result back unchanged."""
+    with patch.object(manager_module, 'scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr) as mock:
+        yield mock
+
+
+@pytest.fixture
+def fake_file_hash():
+    """Patch content hashing to return _FAKE_CONTENT_HASH."""
+    with patch.object(manager_module, 'calculate_file_hash', return_value=_FAKE_CONTENT_HASH) as mock:
+        yield mock
+
+
+def test_init(manager, storage):
+    """Test initialization of DependencyGraphManager."""
+    assert manager.storage == storage
+    assert manager.SUPPORTED_EXTENSIONS == ('.py', '.js', '.ts', '.tsx')
+    assert '.py' in manager.SUPPORTED_EXTENSIONS
+
+
+def _assert_file_processed(filepath, storage, mock_file_open, mock_get_parser, parser, mock_scan_secrets):
+    """Assert that filepath was hashed, parsed, scanned and stored exactly once."""
+    mock_file_open.assert_called_once_with(filepath, 'rb', buffering=0)
+    mock_get_parser.assert_called_once_with(filepath)
+    assert parser.parsed == [filepath]
+    mock_scan_secrets.assert_called_once()
+    assert storage.add_calls == [(filepath, parser.result, _FAKE_CONTENT_HASH)]
+
+
+@pytest.mark.usefixtures('fake_file_hash')
+def test_on_file_event_created(manager, storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test handling a 'created' file event for a Python file."""
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    parser = _StaticParser(_PARSE_RESULT_PY)
+    mock_get_parser.return_value = parser
+    filepath = 'test.py'
+    manager.on_file_event('created', filepath)
+    _assert_file_processed(filepath, storage, mock_file_open, mock_get_parser, parser, mock_scan_secrets)
+
+
+@pytest.mark.usefixtures('mock_scan_secrets', 'fake_file_hash')
+def test_parser_reused_per_suffix(manager, storage, mock_get_parser, patcher):
+    """Test that the parser lookup runs once per file extension."""
+    patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    parser = _StaticParser(_PARSE_RESULT_PY)
+    mock_get_parser.return_value = parser
+
+    manager.on_file_event('created', 'first.py')
+    manager.on_file_event('created', 'second.PY')
+
+    mock_get_parser.assert_called_once_with('first.py')
+    assert parser.parsed == ['first.py', 'second.PY']
+
+
+@pytest.mark.usefixtures('mock_scan_secrets', 'fake_file_hash')
+def test_on_file_event_interns_filepath(manager, storage, mock_get_parser, patcher):
+    """Test that event paths reach storage as the interned string."""
+    patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    mock_get_parser.return_value = _StaticParser(_PARSE_RESULT_PY)
+    filepath = ''.join(['src/', 'test.py'])
+    assert filepath is not sys.intern('src/test.py')
+
+    manager.on_file_event('created', filepath)
+
+    assert storage.add_calls[0][0] is sys.intern('src/test.py')
+
+
+@pytest.mark.usefixtures('fake_file_hash')
+def test_on_file_event_created_javascript(manager, storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test handling a 'created' file event for a JavaScript file."""
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content_js'))
+    parser = _StaticParser(_PARSE_RESULT_JS)
+    mock_get_parser.return_value = parser
+    filepath = 'test.js'
+    manager.on_file_event('created', filepath)
+    _assert_file_processed(filepath, storage, mock_file_open, mock_get_parser, parser, mock_scan_secrets)
+
+
+@pytest.mark.usefixtures('fake_file_hash')
+def test_on_file_event_modified(manager, storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test handling a 'modified' file event for a Python file."""
+    patcher.object(DependencyGraphManager, 'update_function_names', return_value={})
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    parser = _StaticParser(_PARSE_RESULT_PY)
+    mock_get_parser.return_value = parser
+    filepath = 'test.py'
+    manager.on_file_event('modified', filepath)
+    _assert_file_processed(filepath, storage, mock_file_open, mock_get_parser, parser, mock_scan_secrets)
+
+
+@pytest.mark.usefixtures('mock_scan_secrets', 'fake_file_hash')
+def test_hash_memo_skips_reread(manager, storage, mock_get_parser, patcher):
+    """Test that a second 'modified' event with an unchanged mtime and size reuses the memoized hash."""
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    patcher.patch('os.stat', return_value=SimpleNamespace(st_mtime_ns=1_000_000_000, st_size=7))
+    patcher.object(DependencyGraphManager, 'update_function_names', return_value={})
+    parser = _StaticParser(_PARSE_RESULT_PY)
+    mock_get_parser.return_value = parser
+
+    manager.on_file_event('modified', 'test.py')
+    manager.on_file_event('modified', 'test.py')
+
+    mock_file_open.assert_called_once_with('test.py', 'rb', buffering=0)
+    # The fake storage reports no stored hash, so both events are parsed
+    assert parser.parsed == ['test.py', 'test.py']
+    assert [content_hash for _, _, content_hash in storage.add_calls] == [_FAKE_CONTENT_HASH]
+
+
+def test_on_file_event_deleted(manager, storage):
+    """Test handling a 'deleted' file event for a Python file."""
+    filepath = 'test.py'
+    manager.on_file_event('deleted', filepath)
+
+    # Verify the storage was updated
+    assert storage.remove_calls == [filepath]
+
+
+@pytest.mark.parametrize('filepath', ['test.txt', 'test.md', 'test.pyc', 'test.py.bak'])
+def test_on_file_event_unsupported_file(manager, storage, filepath):
+    """Test handling a file event for an unsupported file type."""
+    manager.on_file_event('created', filepath)
+
+    # Verify the storage was not updated
+    assert storage.add_calls == []
+    assert storage.remove_calls == []
+
+
+def test_on_file_event_no_parser(manager, storage, mock_get_parser):
+    """Test handling a file event when no parser is available."""
+    # Set up mocks
+    mock_get_parser.return_value = None
+
+    # Call the method
+    filepath = 'test.py'
+    manager.on_file_event('created', filepath)
+
+    # Verify the storage was not updated
+    assert storage.add_calls == []
+
+
+def test_on_file_event_file_not_found(manager, storage, mock_get_parser):
+    """Test handling a file event when the file is not found."""
+    # Set up mocks
+    mock_get_parser.return_value = _RaisingParser(FileNotFoundError())
+
+    # Call the method - should not raise an exception
+    filepath = 'nonexistent.py'
+    manager.on_file_event('created', filepath)
+
+    # Verify the storage was not updated
+    assert storage.add_calls == []
+
+
+def test_on_file_event_permission_error(manager, storage, mock_get_parser):
+    """Test handling a file event when there's a permission error."""
+    # Set up mocks
+    mock_get_parser.return_value = _RaisingParser(PermissionError())
+
+    # Call the method - should not raise an exception
+    filepath = 'protected.py'
+    manager.on_file_event('created', filepath)
+
+    # Verify the storage was not updated
+    assert storage.add_calls == []
+
+
+def test_on_file_event_invalid_type():
+    """Test handling a file event with an invalid event type."""
+    manager = DependencyGraphManager()
+    manager.on_file_event('invalid', 'test.py')
+    # Instead of raising an error, the method should log a warning and continue
+    # We're just asserting that the method runs without exception
+    assert True  # If we got here, the test passes
+
+
+def test_process_existing_files_directory_not_found(manager, patcher):
+    """Test processing files when the directory doesn't exist."""
+    patcher.filesystem(_FakeFS(exists=False))
+
+    with pytest.raises(FileNotFoundError):
+        manager.process_existing_files('/nonexistent')
+
+
+def test_process_existing_files_not_a_directory(manager, patcher):
+    """Test processing files when the target is not a directory."""
+    patcher.filesystem(_FakeFS(isdir=False))
+
+    with pytest.raises(ValueError):
+        manager.process_existing_files('/test/not_a_dir')
+
+
+def test_start_python_instrumentation(storage, patcher):
+    """Test starting Python instrumentation."""
+    mock_initialize_hook = patcher.object(manager_module, 'initialize_hook')
+    # Set up a manager whose thread factory hands out a mock thread
+    mock_thread = Mock()
+    thread_factory = Mock(return_value=mock_thread)
+    manager = DependencyGraphManager(storage, thread_factory=thread_factory)
+
+    # Call the method with all parameters
+    watch_dir = 'src/test_dir'
+    poll_interval = 0.75
+    exclude_patterns = ['test_', 'excluded']
+    include_patterns = ['main', 'core']
+    cache_dir = '/tmp/test_cache'
+
+    manager.start_python_instrumentation(
+        watch_dir=watch_dir,
+        poll_interval=poll_interval,
+        exclude_patterns=exclude_patterns,
+        include_patterns=include_patterns,
+        cache_dir=cache_dir
+    )
+
+    # Verify initialize_hook was called with the correct parameters
+    expected_dir = os.path.abspath(watch_dir)
+    mock_initialize_hook.assert_called_once_with(
+        expected_dir,
+        exclude_patterns=exclude_patterns,
+        include_patterns=include_patterns,
+        cache_dir=cache_dir
+    )
+
+    # Verify the thread was created and started
+    thread_factory.assert_called_once()
+    assert thread_factory.call_args[1]['target'] == manager._process_function_call_events
+    assert thread_factory.call_args[1]['daemon']
+    mock_thread.start.assert_called_once()
+
+    # Verify instance variables were set correctly
+    assert manager.instrumentation_active
+    assert manager.instrumentation_thread == mock_thread
+    assert manager.instrumentation_watch_dir == expected_dir
+    assert manager.instrumentation_poll_interval == poll_interval
+    assert manager.exclude_patterns == exclude_patterns
+    assert manager.include_patterns == include_patterns
+    assert manager.cache_dir == cache_dir
+
+
+def test_start_python_instrumentation_already_active(storage, patcher):
+    """Test starting Python instrumentation when it's already active."""
+    mock_initialize_hook = patcher.object(manager_module, 'initialize_hook')
+    thread_factory = Mock()
+    manager = DependencyGraphManager(storage, thread_factory=thread_factory)
+    # Simulate already active instrumentation
+    manager.instrumentation_active = True
+
+    # Call the method
+    manager.start_python_instrumentation()
+
+    # Verify initialize_hook was not called
+    mock_initialize_hook.assert_not_called()
+
+    # Verify the thread was not created
+    thread_factory.assert_not_called()
+
+
+def test_stop_python_instrumentation(manager):
+    """Test stopping Python instrumentation."""
+    # Set up for active instrumentation
+    mock_thread = Mock()
+    mock_thread.is_alive.return_value = True
+    manager.instrumentation_active = True
+    manager.instrumentation_thread = mock_thread
+
+    # Call the method
+    manager.stop_python_instrumentation()
+
+    # Verify thread was joined
+    mock_thread.join.assert_called_once_with(timeout=2.0)
+
+    # Verify instance variable was updated
+    assert not manager.instrumentation_active
+
+
+def test_stop_python_instrumentation_not_active(manager):
+    """Test stopping Python instrumentation when it's not active."""
+    # Ensure instrumentation is not active
+    manager.instrumentation_active = False
+
+    # Call the method
+    manager.stop_python_instrumentation()
+
+    # No assertions needed - just verify no exceptions
+
+
+def test_process_function_call_events(manager, patcher):
+    """Test processing function call events from the queue."""
+    mock_get_function_calls = patcher.object(manager_module, 'get_function_calls')
+    # Set up mocks
+    event1 = _EVENT_TEST_FUNC
+    event2 = _EVENT_NESTED_FUNC
+
+    # Configure mock to return events once, then nothing
+    mock_get_function_calls.side_effect = [[event1, event2], []]
+
+    # Capture the events handed to _process_function_call_event, stopping once both arrive
+    processed_events = []
+
+    def process_event(event):
+        processed_events.append(event)
+        if len(processed_events) == 2:
+            manager.stop_python_instrumentation()
+
+    patcher.object(manager, '_process_function_call_event', new=process_event)
+
+    # A long poll interval shows the loop exits on stop rather than after waiting it out
+    manager.instrumentation_poll_interval = 60.0
+    manager.instrumentation_active = True
+    started = time.perf_counter()
+    manager._process_function_call_events()
+
+    # Verify events were processed and the loop returned without waiting for the next poll
+    assert processed_events == [event1, event2]
+    assert time.perf_counter() - started < 5.0
+    mock_get_function_calls.assert_called_once()
+
+
+def test_stop_wakes_polling_thread(manager, patcher):
+    """Test that stopping instrumentation wakes the polling thread instead of letting it wait out the interval."""
+    patcher.object(manager_module, 'initialize_hook')
+    patcher.object(manager_module, 'get_function_calls', return_value=[])
+
+    manager.start_python_instrumentation(poll_interval=60.0)
+    thread = manager.instrumentation_thread
+    started = time.perf_counter()
+    manager.stop_python_instrumentation()
+
+    assert not thread.is_alive()
+    assert time.perf_counter() - started < 2.0
+
+
+def test_function_call_event_contract():
+    """Test that FunctionCallEvent exposes the attributes the manager reads from events."""
+    event = FunctionCallEvent(module_name='test_module', function_name='test_func', filename='test_file.py')
+    assert (event.module_name, event.function_name, event.filename) == ('test_module', 'test_func', 'test_file.py')
+
+
+def test_process_function_call_event():
+    """Test processing a single function call event."""
+    # Set up a real instance with a fake storage
+    manager = DependencyGraphManager(_FakeStorage())
+
+    # Mock the necessary methods
+    manager.update_function_call_count = Mock()
+    manager.process_dynamic_event = Mock()
+
+    # Process the simple function event
+    manager._process_function_call_event(_EVENT_SIMPLE)
+
+    # Verify the function call count was updated
+    manager.update_function_call_count.assert_called_once_with('function:test_module.simple_func')
+    manager.process_dynamic_event.assert_not_called()
+
+    # Reset mocks
+    manager.update_function_call_count.reset_mock()
+    manager.process_dynamic_event.reset_mock()
+
+    # Process the nested function event
+    manager._process_function_call_event(_EVENT_NESTED)
+
+    # Verify both the function call count and dynamic event were processed
+    manager.update_function_call_count.assert_called_once_with('function:test_module.inner_func')
+    manager.process_dynamic_event.assert_called_once_with(
+        'call', 'function:test_module.outer_func', 'function:test_module.inner_func'
+    )
+
+
+def test_clear_instrumentation_cache(manager, patcher):
+    """Test clearing the instrumentation cache."""
+    mock_clear_cache = patcher.patch('graph_core.dynamic.import_hook.clear_transformation_cache')
+    # Set a cache directory
+    cache_dir = '/tmp/test_cache'
+    manager.cache_dir = cache_dir
+
+    # Call the method
+    manager.clear_instrumentation_cache()
+
+    # Verify the cache was cleared with the correct path
+    mock_clear_cache.assert_called_once_with(cache_dir)
+
+
+def test_detect_renames(manager, patcher):
+    """Test detection of renamed files."""
+    mock_time = patcher.patch('time.time')
+    # Set up mock time
+    mock_time.return_value = 100.0
+
+    # Add some deleted and created files to the buffers
+    manager.deleted_files.append((99.0, 'old_file.py'))
+    manager.created_files.append((99.5, 'new_file.py'))
+
+    # Patch the detect_renames function to return a rename event
+    with patch.object(manager_module, 'detect_renames') as mock_detect_renames:
+        mock_detect_renames.return_value = [
+            SimpleNamespace(
+                old_path='old_file.py',
+                new_path='new_file.py'
+            )
         ]
-        
-        mock_parser = Mock()
-        # Need module nodes in parse result for hash storage
-        def side_effect_parse(filepath):
-             filename = os.path.basename(filepath)
-             module_id = f"module:{filename}"
-             return {
-                 'nodes': [{'id': module_id, 'type': 'module', 'name': filename, 'filepath': filepath}],
-                 'edges': []
-             }
-        mock_parser.parse_file.side_effect = side_effect_parse
-        mock_get_parser.return_value = mock_parser
-
-        result = self.manager.process_existing_files(root_dir)
-
-        self.assertEqual(result, 4)
-        self.assertEqual(mock_file_open.call_count, 4)
-        # Check that open was called for each expected file
-        opened_files = {args[0] for args, kwargs in mock_file_open.call_args_list}
-        self.assertEqual(opened_files, {os.path.join(root_dir, 'test1.py'), os.path.join(root_dir, 'test2.js'), os.path.join(subdir, 'test4.ts'), os.path.join(subdir, 'test5.tsx')})
-        self.assertEqual(mock_get_parser.call_count, 4)
-        self.assertEqual(mock_parser.parse_file.call_count, 4)
-        self.assertEqual(mock_scan_secrets.call_count, 4)
-        self.assertEqual(self.storage.add_or_update_file.call_count, 4)
-    
-    @patch('graph_core.manager.scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr)
-    @patch('graph_core.manager.DependencyGraphManager.update_function_names') # Mock rename check
-    @patch('graph_core.manager.get_parser_for_file')
-    def test_skip_modified_event_if_content_unchanged(self, mock_get_parser, mock_update_names, mock_scan_secrets):
-        """Test that 'modified' event processing is skipped if file content hash is the same."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            filepath = os.path.join(temp_dir, "test.py")
-            content = b"def func():\n  pass\n"
-            # Write initial file (real write)
-            with open(filepath, "wb") as f:
-                f.write(content)
-            initial_hash = calculate_content_hash(content)
-
-            # Use real InMemoryStorage for easier hash checking
-            storage = InMemoryGraphStorage()
-            manager = DependencyGraphManager(storage=storage)
-            mock_parser = Mock()
-            mock_parser.parse_file.return_value = {
-                'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': filepath}], 'edges': []
-            }
-            mock_get_parser.return_value = mock_parser
-
-            # Simulate creation - uses REAL open to read file and calculate hash
-            manager.on_file_event('created', filepath)
-
-            # Verify initial processing happened and hash is correct
-            self.assertIsNotNone(storage.get_file_content_hash(filepath))
-            self.assertEqual(storage.get_file_content_hash(filepath), initial_hash)
-            mock_parser.parse_file.assert_called_once_with(filepath)
-            mock_scan_secrets.assert_called_once()
-
-            # Reset mocks for the 'modified' event check
-            mock_parser.reset_mock()
-            mock_scan_secrets.reset_mock()
-            mock_update_names.reset_mock()
-
-            # Simulate modification event WITHOUT changing content
-            # Use mock_open HERE to control the content read for hash comparison
-            with patch('builtins.open', mock_open(read_data=content)) as mock_modified_open:
-                manager.on_file_event('modified', filepath)
-                mock_modified_open.assert_called_with(filepath, 'rb') # Verify open was called for hash check
-
-            # Verify that parser and storage update were SKIPPED
-            mock_parser.parse_file.assert_not_called()
-            mock_scan_secrets.assert_not_called()
-            mock_update_names.assert_not_called()
-
-            # Simulate modification WITH changing content
-            new_content = b"def new_func():\n  pass\n"
-            # Real write to change file content
-            with open(filepath, "wb") as f:
-                 f.write(new_content)
-            new_hash = calculate_content_hash(new_content)
-
-            # Reset mocks
-            mock_parser.reset_mock()
-            mock_scan_secrets.reset_mock()
-            mock_update_names.reset_mock()
-
-            # Use mock_open again HERE to control content read for hash check
-            with patch('builtins.open', mock_open(read_data=new_content)) as mock_modified_open_new:
-                 manager.on_file_event('modified', filepath)
-                 mock_modified_open_new.assert_called_with(filepath, 'rb') # Verify open called
-
-            # Verify processing DID happen this time
-            mock_parser.parse_file.assert_called_once() # Verify parsing happened
-            mock_scan_secrets.assert_called_once()
-            mock_update_names.assert_called_once()
-            self.assertEqual(storage.get_file_content_hash(filepath), new_hash) # Verify hash updated
+
+        # Call detect_renames
+        result = manager.detect_renames()
+
+        # Verify the results
+        assert len(result) == 1
+        assert result[0].old_path == 'old_file.py'
+        assert result[0].new_path == 'new_file.py'
+
+        # Verify the deleted and created files were removed from the buffers
+        assert len(manager.deleted_files) == 0
+        assert len(manager.created_files) == 0
+
+        # Verify the rename history was updated
+        assert manager.rename_history['new_file.py'] == 'old_file.py'
+
+
+def test_detect_renames_drops_expired_entries(manager, patcher):
+    """Test that buffered files older than the detection window are trimmed before matching."""
+    patcher.patch('time.time', return_value=100.0)
+    mock_detect_renames = patcher.object(manager_module, 'detect_renames', return_value=[])
+
+    manager.deleted_files.extend([(90.0, 'stale.py'), (99.0, 'old_file.py')])
+    manager.created_files.append((99.5, 'new_file.py'))
+
+    assert manager.detect_renames() == []
+    mock_detect_renames.assert_called_once_with(['old_file.py'], ['new_file.py'])
+    assert list(manager.deleted_files) == [(99.0, 'old_file.py')]
+    assert list(manager.created_files) == [(99.5, 'new_file.py')]
+
+
+def test_update_node_filepath(manager, storage):
+    """Test updating the filepath property of nodes."""
+    # Set up test data
+    old_path = 'old_file.py'
+    new_path = 'new_file.py'
+
+    # Track the nodes under the old path
+    storage.file_nodes = {old_path: {'node1', 'node2'}}
+    storage.nodes = {
+        'node1': {'id': 'node1', 'filepath': old_path, 'name': 'Test Node 1'},
+        'node2': {'id': 'node2', 'filepath': old_path, 'name': 'Test Node 2'}
+    }
+
+    # Call update_node_filepath
+    result = manager.update_node_filepath(old_path, new_path)
+
+    # Verify the result
+    assert result
+
+    # Verify node updates
+    assert dict(storage.graph.nodes(data=True)) == _EXPECTED_UPDATED_NODES
+
+    # Verify file_nodes updates
+    assert new_path in storage.file_nodes
+    assert old_path not in storage.file_nodes
+    assert storage.file_nodes[new_path] == {'node1', 'node2'}
+
+    # Verify rename history was updated
+    assert manager.rename_history[new_path] == old_path
+
+
+def test_update_node_filepath_nonexistent_file(manager, storage):
+    """Test updating the filepath property of nodes for a nonexistent file."""
+    # Set up test data
+    old_path = 'nonexistent.py'
+    new_path = 'new_file.py'
+
+    # Storage without the old file
+    storage.file_nodes = {}
+
+    # Call update_node_filepath
+    result = manager.update_node_filepath(old_path, new_path)
+
+    # Verify the result
+    assert not result
+
+    # Verify no nodes were updated
+    assert storage.graph.number_of_nodes() == 0
+
+    # Verify rename history was not updated
+    assert new_path not in manager.rename_history
+
+
+@pytest.mark.usefixtures('fake_file_hash')
+def test_on_file_event_with_rename_detection(storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test handling file events with rename detection."""
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    parser = _StaticParser(_PARSE_RESULT_ANOTHER)
+    mock_get_parser.return_value = parser
+    manager = _StubbedManager(storage)
+
+    # --- Test Deletion with Rename ---
+    manager.rename_events = [SimpleNamespace(old_path='old_file.py', new_path='new_file.py')]
+    manager.on_file_event('deleted', 'old_file.py')
+    assert manager.detect_renames_calls == 1 # Ensure rename detection was checked
+    assert storage.remove_calls == [] # File removal should be skipped
+    # Reset mocks for next part
+    mock_file_open.reset_mock()
+    mock_get_parser.reset_mock()
+    mock_scan_secrets.reset_mock()
+    storage.reset()
+
+    # --- Test Creation with Rename ---
+    manager.on_file_event('created', 'new_file.py')
+    assert manager.detect_renames_calls == 2 # Rename detection checked again
+    assert manager.filepath_updates == [('old_file.py', 'new_file.py')]
+    # Parsing and adding should be skipped
+    mock_file_open.assert_not_called() # No open needed if renamed
+    mock_get_parser.assert_not_called()
+    mock_scan_secrets.assert_not_called()
+    assert storage.add_calls == []
+    manager.filepath_updates.clear()
+
+    # --- Test Creation without Rename ---
+    manager.rename_events = [] # Simulate no rename detected
+    manager.on_file_event('created', 'another_file.py')
+    assert manager.detect_renames_calls == 3
+    assert manager.filepath_updates == [] # update_node_filepath shouldn't be called
+    # File should be opened, parsed, scanned, and added
+    mock_file_open.assert_called_with('another_file.py', 'rb', buffering=0) # Opened for hashing
+    mock_get_parser.assert_called_with('another_file.py')
+    assert parser.parsed == ['another_file.py']
+    mock_scan_secrets.assert_called() # Secrets scan should run
+    assert storage.add_calls # Add should be called
+
+
+@pytest.mark.usefixtures('fake_file_hash')
+def test_process_existing_files(manager, storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test processing existing files in a directory."""
+    patcher.filesystem(_FakeFS(walk_result=_WALK_RESULT))
+    mock_file_open = patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    mock_stat = patcher.patch('os.stat')
+
+    mock_parser = Mock()
+    mock_parser.parse_file.side_effect = _WALKED_PARSE_RESULTS.__getitem__
+    mock_get_parser.return_value = mock_parser
+
+    result = manager.process_existing_files(_WALK_ROOT)
+
+    assert result == 4
+    # The hash memo uses the stat results from the directory scan
+    mock_stat.assert_not_called()
+    assert mock_file_open.call_count == 4
+    # Check that open was called for each expected file
+    assert {args[0] for args, _ in mock_file_open.call_args_list} == _WALKED_FILES
+    assert mock_get_parser.call_count == 4
+    assert mock_parser.parse_file.call_count == 4
+    assert mock_scan_secrets.call_count == 4
+    assert len(storage.add_calls) == 4
+
+
+def test_process_existing_files_hashes_on_worker_threads(manager, storage, mock_get_parser, mock_scan_secrets, patcher):
+    """Test that the initial scan hashes each file once, off the calling thread."""
+    patcher.filesystem(_FakeFS(walk_result=_WALK_RESULT))
+    patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    hashing_threads = []
+
+    def record_hash(f):
+        hashing_threads.append(threading.current_thread())
+        return _FAKE_CONTENT_HASH
+
+    patcher.object(manager_module, 'calculate_file_hash', side_effect=record_hash)
+    mock_get_parser.return_value = _StaticParser(_PARSE_RESULT_FUNC)
+
+    assert manager.process_existing_files(_WALK_ROOT) == 4
+
+    assert len(hashing_threads) == 4
+    assert threading.current_thread() not in hashing_threads
+    assert all(content_hash == _FAKE_CONTENT_HASH for _, _, content_hash in storage.add_calls)
+
+
+def test_on_file_events_bulk(manager, storage, mock_get_parser, mock_scan_secrets, fake_file_hash, patcher):
+    """Test that a group of events is handled like the same events one by one."""
+    patcher.patch('builtins.open', side_effect=_bytes_opener(b'content'))
+    parser = _StaticParser(_PARSE_RESULT_FUNC)
+    mock_get_parser.return_value = parser
+    filepaths = ['a.py', 'b.py', 'c.py']
+
+    manager.on_file_events_bulk('created', filepaths)
+    assert sorted(parser.parsed) == filepaths
+    assert [filepath for filepath, _, _ in storage.add_calls] == filepaths
+
+    manager.on_file_events_bulk('deleted', filepaths[:2])
+    assert storage.remove_calls == filepaths[:2]
+
+
+def test_on_file_events_bulk_many_events(manager, storage, patcher):
+    """Test a large group of events, with plain stand-ins rather than mocks on the per-event path."""
+    parser = _StaticParser(_PARSE_RESULT_FUNC)
+    patcher.patch('builtins.open', new=_bytes_opener(b'content'))
+    patcher.object(manager_module, 'calculate_file_hash', new=lambda f: _FAKE_CONTENT_HASH)
+    patcher.object(manager_module, 'get_parser_for_file', new=lambda filepath: parser)
+    patcher.object(manager_module, 'scan_parse_result_for_secrets', new=lambda pr, fp: pr)
+    filepaths = [f'module_{i}.py' for i in range(5000)]
+
+    manager.on_file_events_bulk('created', filepaths)
+
+    assert parser.parsed == filepaths
+    assert len(storage.add_calls) == len(filepaths)
+
+
+@pytest.fixture(scope='class')
+def mock_parsing():
+    """Patch parser lookup, secret scanning, content hashing and rename checks once per class."""
+    parser = _StaticParser(_PARSE_RESULT_FUNC)
+    with patch.object(manager_module, 'get_parser_for_file', return_value=parser), \
+            patch.object(manager_module, 'calculate_file_hash', return_value=_FAKE_CONTENT_HASH), \
+            patch.object(manager_module, 'scan_parse_result_for_secrets', side_effect=lambda pr, fp: pr), \
+            patch.object(DependencyGraphManager, 'update_function_names', return_value={}):
+        yield parser
+
+
+class TestOnFileEventMatrix:
+    """Storage calls made by on_file_event for each event type."""
+
+    @pytest.mark.parametrize('event_type,filepath,expected_adds,expected_removes', [
+        ('created', 'test1.py', 1, 0),
+        ('modified', 'test2.js', 1, 0),
+        ('deleted', 'test3.ts', 0, 1),
+        ('created', 'test4.txt', 0, 0),  # Unsupported
+    ])
+    def test_on_file_event_matrix(self, mock_parsing, manager, primed_storage,
+                                  event_type, filepath, expected_adds, expected_removes):
+        """Test the storage calls made for each event type, as dispatched by the file watcher."""
+        # The watcher accepts any (event_type, filepath) callable as its callback
+        callback = manager.on_file_event
+        assert callable(callback)
+
+        with patch('builtins.open', side_effect=_bytes_opener(b'content')):
+            callback(event_type, filepath)
+
+        assert len(primed_storage.add_calls) == expected_adds
+        assert len(primed_storage.remove_calls) == expected_removes
+        if expected_adds:
+            added_path, _, content_hash = primed_storage.add_calls[0]
+            assert added_path == filepath
+            assert content_hash == _FAKE_CONTENT_HASH
+        if expected_removes:
+            assert primed_storage.remove_calls == [filepath]
+
+
+def test_skip_duplicate_created_event(mock_get_parser, mock_scan_secrets, tmp_path):
+    """Test that a repeated 'created' event for unchanged content doesn't re-parse the file."""
+    filepath = str(tmp_path / "test.py")
+    with open(filepath, "wb") as f:
+        f.write(b"def func():\n  pass\n")
+
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+    parser = _StaticParser({
+        'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': filepath}], 'edges': []
+    })
+    mock_get_parser.return_value = parser
+
+    manager.on_file_event('created', filepath)
+    manager.on_file_event('created', filepath)
+
+    assert parser.parsed == [filepath]
+    mock_scan_secrets.assert_called_once()
+
+
+# Swaps in real storage for the storage fixture, so manager is built on it
+@pytest.mark.parametrize('storage', [pytest.param(InMemoryGraphStorage(), id='in_memory')])
+def test_update_node_filepath_then_remove(manager, storage):
+    """Test that nodes moved by a rename are removed with the new path."""
+    storage.add_or_update_file('old_file.py', {
+        'nodes': [{'id': 'function:func', 'type': 'function', 'name': 'func', 'filepath': 'old_file.py'}],
+        'edges': []
+    })
+
+    assert manager.update_node_filepath('old_file.py', 'new_file.py')
+    node = storage.get_node('function:func')
+    assert node['files'] == ['new_file.py']
+    assert node['rename_history'] == ['old_file.py']
+
+    storage.remove_file('new_file.py')
+    assert storage.get_node('function:func') is None
+
+
+def test_migration_to_json_storage(tmp_path):
+    """Test migrating an in-memory graph to JSON storage in a single write."""
+    manager = DependencyGraphManager.create_with_memory_storage()
+    manager.storage.add_or_update_file('test.py', {
+        'nodes': [
+            {'id': 'function:caller', 'type': 'function', 'name': 'caller'},
+            {'id': 'function:callee', 'type': 'function', 'name': 'callee'}
+        ],
+        'edges': [{'source': 'function:caller', 'target': 'function:callee', 'type': 'calls'}]
+    })
+
+    json_path = str(tmp_path / 'graph.json')
+    assert manager.migrate_to_json_storage(json_path)
+    assert manager.is_json_storage
+    assert isinstance(manager.storage, JSONGraphStorage)
+
+    reloaded = JSONGraphStorage(json_path)
+    assert reloaded.get_node_count() == 2
+    assert reloaded.get_edge_count() == 1
+    assert reloaded.file_nodes['test.py'] == {'function:caller', 'function:callee'}
+
+
+def test_repeated_dynamic_calls_update_one_edge():
+    """Test that repeated dynamic calls increment the existing 'calls' edge."""
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+    storage.add_or_update_file('test.py', {
+        'nodes': [
+            {'id': 'function:caller', 'type': 'function', 'name': 'caller'},
+            {'id': 'function:callee', 'type': 'function', 'name': 'callee'}
+        ],
+        'edges': []
+    })
+
+    assert manager.process_dynamic_event('call', 'function:caller', 'function:callee')
+    assert manager.process_dynamic_event('call', 'function:caller', 'function:callee')
+
+    edges = storage.get_out_edges('function:caller')
+    assert len(edges) == 1
+    assert edges[0]['type'] == 'calls'
+    assert edges[0]['dynamic_call_count'] == 2
+
+
+def test_skip_modified_event_if_content_unchanged(mock_get_parser, mock_scan_secrets, patcher, tmp_path):
+    """Test that 'modified' event processing is skipped if file content hash is the same."""
+    mock_update_names = patcher.object(DependencyGraphManager, 'update_function_names')  # Mock rename check
+    filepath = str(tmp_path / "test.py")
+    content = b"def func():\n  pass\n"
+    # Write initial file (real write)
+    with open(filepath, "wb") as f:
+        f.write(content)
+    initial_hash = calculate_content_hash(content)
+
+    # Use real InMemoryStorage for easier hash checking
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+    parser = _StaticParser({
+        'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': filepath}], 'edges': []
+    })
+    mock_get_parser.return_value = parser
+
+    # Simulate creation - uses REAL open to read file and calculate hash
+    manager.on_file_event('created', filepath)
+
+    # Verify initial processing happened and hash is correct
+    assert storage.get_file_content_hash(filepath) == initial_hash
+    assert parser.parsed == [filepath]
+    mock_scan_secrets.assert_called_once()
+
+    # Reset mocks for the 'modified' event check
+    parser.parsed.clear()
+    mock_scan_secrets.reset_mock()
+    mock_update_names.reset_mock()
+
+    # Simulate modification event WITHOUT changing content
+    # Patch open HERE to control the content read for hash comparison
+    with patch('builtins.open', side_effect=_bytes_opener(content)) as mock_modified_open:
+        manager.on_file_event('modified', filepath)
+        mock_modified_open.assert_called_with(filepath, 'rb', buffering=0)  # Verify open was called for hash check
+
+    # Verify that parser and storage update were SKIPPED
+    assert parser.parsed == []
+    mock_scan_secrets.assert_not_called()
+    mock_update_names.assert_not_called()
+
+    # Simulate modification WITH changing content
+    new_content = b"def new_func():\n  pass\n"
+    # Real write to change file content
+    with open(filepath, "wb") as f:
+        f.write(new_content)
+    new_hash = calculate_content_hash(new_content)
+
+    # Patch open again HERE to control content read for hash check
+    with patch('builtins.open', side_effect=_bytes_opener(new_content)) as mock_modified_open_new:
+        manager.on_file_event('modified', filepath)
+        mock_modified_open_new.assert_called_with(filepath, 'rb', buffering=0)  # Verify open called
+
+    # Verify processing DID happen this time
+    assert parser.parsed == [filepath]
+    mock_scan_secrets.assert_called_once()
+    mock_update_names.assert_called_once()
+    assert storage.get_file_content_hash(filepath) == new_hash  # Verify hash updated
+
+
+def test_skip_modified_event_without_reading_if_stat_unchanged(mock_get_parser, mock_scan_secrets, tmp_path):
+    """Test that a 'modified' event for a file with unchanged mtime and size doesn't reopen it."""
+    filepath = str(tmp_path / "test.py")
+    with open(filepath, "wb") as f:
+        f.write(b"def func():\n  pass\n")
+    # Backdate the file so its mtime is outside the racy window and the hash is memoized
+    old_time = time.time() - 60
+    os.utime(filepath, (old_time, old_time))
+
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+    parser = _StaticParser({
+        'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': filepath}], 'edges': []
+    })
+    mock_get_parser.return_value = parser
+
+    manager.on_file_event('created', filepath)
+    assert parser.parsed == [filepath]
+
+    with patch('builtins.open', side_effect=AssertionError("file should not be reopened")) as mock_modified_open:
+        manager.on_file_event('modified', filepath)
+    mock_modified_open.assert_not_called()
+    assert parser.parsed == [filepath]
+
+
+def test_skip_when_parse_result_unchanged(tmp_path):
+    """Test that an edit which leaves the parse result unchanged only updates the stored hash."""
+    filepath = str(tmp_path / "test.py")
+    with open(filepath, "w") as f:
+        f.write("# first comment\ndef func():\n  return helper()\n\nclass Helper:\n  pass\n")
+
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+
+    manager.on_file_event('created', filepath)
+    # The real parser produces contains edges, whose IDs must not change between parses
+    assert storage.get_all_edges()
+
+    # Editing the comment changes the content but not what the parser extracts
+    new_content = "# edited comment\ndef func():\n  return helper()\n\nclass Helper:\n  pass\n"
+    with open(filepath, "w") as f:
+        f.write(new_content)
+    with patch.object(storage, 'add_or_update_file', wraps=storage.add_or_update_file) as mock_add:
+        manager.on_file_event('modified', filepath)
+
+    mock_add.assert_not_called()
+    assert storage.get_file_content_hash(filepath) == calculate_content_hash(new_content.encode())
+
+
+def test_hash_cache_survives_restart(mock_get_parser, mock_scan_secrets, tmp_path):
+    """Test that a restarted manager reuses persisted hashes instead of rehashing and reparsing."""
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    filepath = str(src_dir / "test.py")
+    with open(filepath, "wb") as f:
+        f.write(b"def func():\n  pass\n")
+    old_time = time.time() - 60
+    os.utime(filepath, (old_time, old_time))
+
+    json_path = str(tmp_path / "graph.json")
+    hash_cache_path = str(tmp_path / "hashes.json")
+    parser = _StaticParser({
+        'nodes': [{'id': 'module:test.py', 'type': 'module', 'name': 'test.py', 'filepath': filepath}], 'edges': []
+    })
+    mock_get_parser.return_value = parser
+
+    first = DependencyGraphManager(storage=JSONGraphStorage(json_path), hash_cache_path=hash_cache_path)
+    assert first.process_existing_files(str(src_dir)) == 1
+    first.flush()
+    assert os.path.exists(hash_cache_path)
+    assert parser.parsed == [filepath]
+
+    second = DependencyGraphManager(storage=JSONGraphStorage(json_path), hash_cache_path=hash_cache_path)
+    with patch.object(manager_module, 'calculate_file_hash') as mock_hash:
+        second.process_existing_files(str(src_dir))
+    mock_hash.assert_not_called()
+    assert parser.parsed == [filepath]
+
+
+def test_process_existing_files_skips_unreadable_directory(mock_get_parser, mock_scan_secrets, tmp_path):
+    """Test that an unreadable subdirectory is skipped without aborting the initial scan."""
+    filepath = str(tmp_path / "readable.py")
+    with open(filepath, "w") as f:
+        f.write("def func():\n  pass\n")
+    locked_dir = tmp_path / "locked"
+    locked_dir.mkdir()
+    with open(locked_dir / "hidden.py", "w") as f:
+        f.write("def hidden():\n  pass\n")
+
+    mock_get_parser.return_value.parse_file.side_effect = lambda fp: {
+        'nodes': [{'id': f'module:{fp}', 'type': 'module', 'name': os.path.basename(fp), 'filepath': fp}], 'edges': []
+    }
+
+    # Permission bits are not enforced for root or on Windows, so deny the listing directly
+    real_scandir = os.scandir
+    def scandir(path):
+        if os.fspath(path) == str(locked_dir):
+            raise PermissionError(13, "Permission denied", path)
+        return real_scandir(path)
+
+    storage = InMemoryGraphStorage()
+    manager = DependencyGraphManager(storage=storage)
+    with patch.object(manager_module.os, 'scandir', side_effect=scandir):
+        processed = manager.process_existing_files(str(tmp_path))
+
+    assert processed == 1
+    assert storage.get_node(f'module:{filepath}') is not None
 
 
 if __name__ == '__main__':
-    unittest.main() 
\ No newline at end of file
+    pytest.main([__file__]) 
\ No newline at end of file
@@ -7,9 +7,12 @@ import time
 import shutil
 import tempfile
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, mock_open, patch
 
-from graph_core.watchers.file_watcher import start_file_watcher, _map_event_type, EventType
+from graph_core.watchers.file_watcher import (
+    start_file_watcher, start_bulk_file_watcher, iter_file_events, _map_event_type, _is_network_filesystem,
+    WatcherDispatcher, EventType, DEFAULT_POLL_DELAY_MS, NETWORK_POLL_DELAY_MS
+)
 from watchfiles import Change
 
 
@@ -136,6 +139,194 @@ class TestFileWatcher(unittest.TestCase):
         for call in expected_calls:
             self.assertIn(call, self.callback.mock_calls)
     
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_start_file_watcher_coalesces_changes_per_file(self, mock_watch):
+        """Test start_file_watcher dispatches one event per file in a batch, by priority."""
+        file1 = os.path.join(self.temp_dir, "file1")
+        file2 = os.path.join(self.temp_dir, "file2")
+        file3 = os.path.join(self.temp_dir, "file3")
+        
+        mock_watch.return_value = [
+            {
+                (Change.added, file1),
+                (Change.modified, file1),
+                (Change.modified, file2),
+                (Change.modified, file3),
+                (Change.deleted, file3),
+            }
+        ]
+        
+        start_file_watcher(self.callback, self.temp_dir, debounce_ms=200, step_ms=20)
+        
+        mock_watch.assert_called_once_with(
+            self.temp_dir, debounce=200, step=20, force_polling=False, poll_delay_ms=DEFAULT_POLL_DELAY_MS
+        )
+        expected_calls = [
+            unittest.mock.call(EventType.CREATED.value, file1),
+            unittest.mock.call(EventType.MODIFIED.value, file2),
+            unittest.mock.call(EventType.DELETED.value, file3)
+        ]
+        self.assertEqual(len(self.callback.mock_calls), 3)
+        for call in expected_calls:
+            self.assertIn(call, self.callback.mock_calls)
+    
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_start_file_watcher_recreated_file(self, mock_watch):
+        """Test that a file deleted and re-created in one batch is reported as created only if it exists."""
+        saved = os.path.join(self.temp_dir, "saved")
+        with open(saved, "w") as f:
+            f.write("test")
+        removed = os.path.join(self.temp_dir, "removed")
+        
+        mock_watch.return_value = [
+            {
+                (Change.deleted, saved),
+                (Change.added, saved),
+                (Change.added, removed),
+                (Change.deleted, removed),
+            }
+        ]
+        
+        start_file_watcher(self.callback, self.temp_dir)
+        
+        self.assertEqual(len(self.callback.mock_calls), 2)
+        self.assertIn(unittest.mock.call(EventType.CREATED.value, saved), self.callback.mock_calls)
+        self.assertIn(unittest.mock.call(EventType.DELETED.value, removed), self.callback.mock_calls)
+    
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_iter_file_events_bounded_batches(self, mock_watch):
+        """Test iter_file_events splits a large burst of changes into bounded batches."""
+        paths = [os.path.join(self.temp_dir, f"file{i}") for i in range(10000)]
+        mock_watch.return_value = [{(Change.modified, path) for path in paths}]
+        
+        batches = list(iter_file_events(self.temp_dir, batch_size=256))
+        
+        self.assertEqual(len(batches), 40)
+        self.assertTrue(all(len(batch) <= 256 for batch in batches))
+        self.assertEqual(
+            sorted(event for batch in batches for event in batch),
+            sorted((EventType.MODIFIED.value, path) for path in paths)
+        )
+    
+    def test_iter_file_events_checks_directory_eagerly(self):
+        """Test iter_file_events validates the directory before any batch is requested."""
+        with self.assertRaises(FileNotFoundError):
+            iter_file_events("non_existent_directory")
+        with self.assertRaises(ValueError):
+            iter_file_events(self.temp_dir, batch_size=0)
+    
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_start_file_watcher_suffix_filter(self, mock_watch):
+        """Test start_file_watcher only calls the callback for files with a watched suffix."""
+        source_file = os.path.join(self.temp_dir, "module.PY")
+        mock_watch.return_value = [
+            {
+                (Change.modified, source_file),
+                (Change.modified, os.path.join(self.temp_dir, "notes.txt")),
+                (Change.added, os.path.join(self.temp_dir, "image.png")),
+            }
+        ]
+        
+        start_file_watcher(self.callback, self.temp_dir, suffixes=('.py', '.js'))
+        
+        self.callback.assert_called_once_with(EventType.MODIFIED.value, source_file)
+    
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_bulk_dispatch(self, mock_watch):
+        """Test start_bulk_file_watcher hands over each batch grouped by event type, deletions first."""
+        file1 = os.path.join(self.temp_dir, "file1")
+        file2 = os.path.join(self.temp_dir, "file2")
+        file3 = os.path.join(self.temp_dir, "file3")
+        file4 = os.path.join(self.temp_dir, "file4")
+        
+        mock_watch.return_value = [
+            {
+                (Change.added, file1),
+                (Change.modified, file2),
+                (Change.deleted, file3),
+                (Change.added, file4),
+            }
+        ]
+        
+        start_bulk_file_watcher(self.callback, self.temp_dir)
+        
+        self.assertEqual(
+            [(args[0], sorted(args[1])) for args, _ in self.callback.call_args_list],
+            [
+                (EventType.DELETED.value, [file3]),
+                (EventType.CREATED.value, [file1, file4]),
+                (EventType.MODIFIED.value, [file2]),
+            ]
+        )
+    
+    @patch('graph_core.watchers.file_watcher._is_network_filesystem', return_value=True)
+    @patch('graph_core.watchers.file_watcher.watch')
+    def test_network_filesystem_polled(self, mock_watch, mock_is_network):
+        """Test that a directory on a network filesystem is watched by polling, at a longer interval."""
+        mock_watch.return_value = []
+        
+        start_file_watcher(self.callback, self.temp_dir)
+        
+        _, kwargs = mock_watch.call_args
+        self.assertTrue(kwargs['force_polling'])
+        self.assertEqual(kwargs['poll_delay_ms'], NETWORK_POLL_DELAY_MS)
+        
+        # Explicit settings take precedence
+        start_file_watcher(self.callback, self.temp_dir, force_polling=False, poll_delay_ms=500)
+        
+        _, kwargs = mock_watch.call_args
+        self.assertFalse(kwargs['force_polling'])
+        self.assertEqual(kwargs['poll_delay_ms'], 500)
+    
+    def test_is_network_filesystem(self):
+        """Test that the filesystem type comes from the most specific mount containing the path."""
+        real_dir = os.path.realpath(self.temp_dir)
+        mounts = (
+            "/dev/sda1 / ext4 rw,relatime 0 0\n"
+            f"server:/export {real_dir} nfs4 rw,relatime 0 0\n"
+        )
+        with patch('builtins.open', mock_open(read_data=mounts)):
+            self.assertTrue(_is_network_filesystem(os.path.join(self.temp_dir, "sub")))
+            self.assertFalse(_is_network_filesystem(os.path.dirname(real_dir)))
+    
+    def test_dispatcher_delivers_every_event(self):
+        """Test that the dispatcher hands every event to a slow callback, in order, without dropping any."""
+        handled = []
+        
+        def slow_callback(event_type, file_path):
+            time.sleep(0)
+            handled.append((event_type, file_path))
+        
+        dispatcher = WatcherDispatcher(slow_callback, max_pending=64)
+        events = [(EventType.MODIFIED.value, os.path.join(self.temp_dir, f"file{i}")) for i in range(10000)]
+        for event_type, file_path in events:
+            dispatcher(event_type, file_path)
+        
+        self.assertTrue(dispatcher.join(timeout=30))
+        dispatcher.close()
+        self.assertEqual(handled, events)
+        with self.assertRaises(RuntimeError):
+            dispatcher(EventType.MODIFIED.value, events[0][1])
+    
+    def test_dispatcher_coalesces_queued_events(self):
+        """Test that an event for a file that is still queued replaces the queued one."""
+        file1 = os.path.join(self.temp_dir, "file1")
+        file2 = os.path.join(self.temp_dir, "file2")
+        # The worker thread is never started, so events stay queued until _run is called below
+        dispatcher = WatcherDispatcher(self.callback, thread_factory=Mock())
+        
+        dispatcher(EventType.CREATED.value, file1)
+        dispatcher(EventType.MODIFIED.value, file2)
+        dispatcher(EventType.MODIFIED.value, file1)
+        dispatcher(EventType.DELETED.value, file2)
+        dispatcher.close()
+        dispatcher._run()
+        
+        self.assertEqual(self.callback.mock_calls, [
+            unittest.mock.call(EventType.CREATED.value, file1),
+            unittest.mock.call(EventType.DELETED.value, file2),
+        ])
+    
     @patch('graph_core.watchers.file_watcher.watch')
     def test_callback_exception_handled(self, mock_watch):
         """Test that exceptions in the callback are handled properly."""
@@ -102,6 +102,25 @@ class TestModuleFiltering(unittest.TestCase):
         self.assertTrue(instrumenter.should_instrument(self.main_file))
         self.assertFalse(instrumenter.should_instrument(self.utils_file))
         self.assertFalse(instrumenter.should_instrument(self.test_file))
+    
+    def test_patterns_with_inline_flags(self):
+        """Test patterns that cannot be joined into one regex are still matched individually."""
+        exclude_patterns = ["(?i)UTILS", "test_"]
+        instrumenter = PythonInstrumenter(self.watch_dir, exclude_patterns=exclude_patterns)
+        
+        self.assertTrue(instrumenter.should_instrument(self.main_file))
+        self.assertFalse(instrumenter.should_instrument(self.utils_file))
+        self.assertFalse(instrumenter.should_instrument(self.test_file))
+    
+    def test_patterns_with_backreferences(self):
+        """Test numbered backreferences still refer to their own pattern's groups."""
+        # In a single alternation, \1 in the second pattern would point at the first pattern's group
+        exclude_patterns = ["(x)yz", r"(t)es\1"]
+        instrumenter = PythonInstrumenter(self.watch_dir, exclude_patterns=exclude_patterns)
+        
+        self.assertTrue(instrumenter.should_instrument(self.main_file))
+        self.assertTrue(instrumenter.should_instrument(self.utils_file))
+        self.assertFalse(instrumenter.should_instrument(self.test_file))
 
 
 class TestTransformationCache(unittest.TestCase):
@@ -132,6 +151,18 @@ class TestTransformationCache(unittest.TestCase):
         cached_code = self.cache.get(self.test_file, self.original_code)
         self.assertEqual(cached_code, self.transformed_code)
     
+    def test_cache_entry_stored_as_source(self):
+        """Test that entries are stored as plain source in a shard directory, and reload from disk."""
+        self.cache.put(self.test_file, self.original_code, self.transformed_code)
+        
+        cache_path = self.cache.get_cache_path(self.cache.get_cache_key(self.test_file, self.original_code))
+        self.assertEqual(os.path.dirname(os.path.dirname(cache_path)), self.cache_dir)
+        with open(cache_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.transformed_code)
+        
+        # A fresh cache has an empty memory cache, so this reads the entry back from disk
+        self.assertEqual(TransformationCache(self.cache_dir).get(self.test_file, self.original_code), self.transformed_code)
+    
     def test_cache_key_based_on_content(self):
         """Test that the cache key is based on the content, not just the filename."""
         # Put code in the cache
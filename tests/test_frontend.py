@@ -11,21 +11,12 @@ import sys
 import logging
 import unittest
 import json
+from collections import Counter
 from unittest.mock import patch, Mock
 
 
-class FrontendTestDocumentation(unittest.TestCase):
-    """
-    This is not an actual test case but a documentation of how to test the frontend.
-    """
-    
-    def test_documentation(self):
-        """Provide documentation on how to test the frontend."""
-        # This test always passes as it's just documentation
-        frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
-        
-        # Print test instructions
-        instructions = """
+# Manual frontend test instructions, printed by FrontendTestDocumentation
+_FRONTEND_INSTRUCTIONS = """
         Frontend Test Instructions
         =========================
         
@@ -83,12 +74,28 @@ class FrontendTestDocumentation(unittest.TestCase):
            - Verify that the API endpoints return data:
              - http://127.0.0.1:8000/graph/nodes
              - http://127.0.0.1:8000/graph/edges
-        """.format(
-            frontend_path=frontend_path,
-            project_root=os.path.dirname(os.path.dirname(__file__))
-        )
+"""
+
+
+class FrontendTestDocumentation(unittest.TestCase):
+    """
+    This is not an actual test case but a documentation of how to test the frontend.
+    """
+    
+    def test_documentation(self):
+        """Provide documentation on how to test the frontend."""
+        # This test is just documentation, so only print it when asked to
+        if not os.environ.get('GRAPH_ENGINE_PRINT_FRONTEND_DOCS'):
+            self.skipTest("set GRAPH_ENGINE_PRINT_FRONTEND_DOCS=1 to print the frontend test instructions")
+        
+        project_root = os.path.dirname(os.path.dirname(__file__))
+        frontend_path = os.path.join(project_root, 'frontend')
         
-        print(instructions)
+        # Print test instructions
+        print(_FRONTEND_INSTRUCTIONS.format(
+            frontend_path=frontend_path,
+            project_root=project_root
+        ))
         self.assertTrue(True)
 
 
@@ -145,16 +152,14 @@ class MockFrontendTest(unittest.TestCase):
         self.assertEqual(len(mock_edges), 2, "Should load 2 edges")
         
         # Check that filtering works for node types
-        module_nodes = [n for n in mock_nodes if n["type"] == "module"]
-        function_nodes = [n for n in mock_nodes if n["type"] == "function"]
-        self.assertEqual(len(module_nodes), 1)
-        self.assertEqual(len(function_nodes), 1)
+        node_type_counts = Counter(n["type"] for n in mock_nodes)
+        self.assertEqual(node_type_counts["module"], 1)
+        self.assertEqual(node_type_counts["function"], 1)
         
         # Check that filtering works for dynamic edges
-        dynamic_edges = [e for e in mock_edges if e.get("dynamic")]
-        non_dynamic_edges = [e for e in mock_edges if not e.get("dynamic")]
-        self.assertEqual(len(dynamic_edges), 1)
-        self.assertEqual(len(non_dynamic_edges), 1)
+        dynamic_edge_count = sum(1 for e in mock_edges if e.get("dynamic"))
+        self.assertEqual(dynamic_edge_count, 1)
+        self.assertEqual(len(mock_edges) - dynamic_edge_count, 1)
         
         # Verify that edges with dynamic_call_count are properly processed
         edges_with_calls = [e for e in mock_edges if e.get("dynamic_call_count", 0) > 0]
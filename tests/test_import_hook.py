@@ -4,28 +4,28 @@ Tests for the dynamic import hook.
 
 import os
 import sys
+import shutil
 import tempfile
-from pathlib import Path
 import importlib
 import types
+import uuid
 import unittest.mock
 import pytest
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from graph_core.dynamic import import_hook
 
 
-@pytest.fixture
-def sample_module_path():
-    """Create a temporary directory with a sample Python module."""
-    with tempfile.TemporaryDirectory() as tempdir:
-        # Create a sample Python module
-        module_path = Path(tempdir) / "sample_module.py"
-        
-        with open(module_path, "w") as f:
-            f.write("""
+@pytest.fixture(scope="session")
+def instrumentation_cache_dir(tmp_path_factory):
+    """Keep transformed modules out of the user's ~/.instrumentation_cache."""
+    return str(tmp_path_factory.mktemp("instrumentation_cache"))
+
+
+@pytest.fixture(scope="session")
+def sample_module_path(tmp_path_factory):
+    """Create a sample Python module, shared by the tests in this session."""
+    module_path = tmp_path_factory.mktemp("samples") / "sample_module.py"
+    module_path.write_text("""
 def hello_world():
     return "Hello, World!"
 
@@ -42,19 +42,14 @@ class Person:
 async def async_function():
     return "Async Hello!"
 """)
-        
-        yield str(module_path)
+    return str(module_path)
 
 
-@pytest.fixture
-def advanced_module_path():
-    """Create a temporary directory with a Python module containing advanced patterns."""
-    with tempfile.TemporaryDirectory() as tempdir:
-        # Create a sample Python module with advanced patterns
-        module_path = Path(tempdir) / "advanced_module.py"
-        
-        with open(module_path, "w") as f:
-            f.write('''
+@pytest.fixture(scope="session")
+def advanced_module_path(tmp_path_factory):
+    """Create a Python module containing advanced patterns, shared by the tests in this session."""
+    module_path = tmp_path_factory.mktemp("samples") / "advanced_module.py"
+    module_path.write_text('''
 # Module with nested functions, closures, and complex class patterns
 
 def outer_function(x):
@@ -119,8 +114,7 @@ async def fetch_data(url):
     data = f"Data from {url}"
     return process_data(data)
 ''')
-        
-        yield str(module_path)
+    return str(module_path)
 
 
 def test_instrumentation_transformer():
@@ -154,11 +148,11 @@ async def async_test():
     assert "async_test" in transformed_code
 
 
-def test_should_instrument():
+def test_should_instrument(instrumentation_cache_dir):
     """Test the logic for determining if a file should be instrumented."""
     # Create instrumenter with watch_dir set to /tmp
     with tempfile.TemporaryDirectory() as tempdir:
-        instrumenter = import_hook.PythonInstrumenter(tempdir)
+        instrumenter = import_hook.PythonInstrumenter(tempdir, cache_dir=instrumentation_cache_dir)
         
         # Files in the watch directory should be instrumented
         py_file_in_dir = os.path.join(tempdir, "test.py")
@@ -173,7 +167,7 @@ def test_should_instrument():
         assert instrumenter.should_instrument(non_py_file) is False
 
 
-def test_instrument_code():
+def test_instrument_code(instrumentation_cache_dir):
     """Test code instrumentation."""
     # Sample Python code
     sample_code = """
@@ -182,7 +176,7 @@ def test_function():
 """
     
     with tempfile.TemporaryDirectory() as tempdir:
-        instrumenter = import_hook.PythonInstrumenter(tempdir)
+        instrumenter = import_hook.PythonInstrumenter(tempdir, cache_dir=instrumentation_cache_dir)
         filename = os.path.join(tempdir, "test.py")
         
         # Instrument the code
@@ -209,47 +203,102 @@ def test_function_call_event():
     assert "test.py" in str(event)
 
 
+def _link_or_copy(src, dst):
+    """Hard link a shared sample into place, copying it where hard links aren't supported."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def test_link_or_copy_falls_back_to_copy(sample_module_path, tmp_path):
+    """Test that samples are copied when the filesystem doesn't support hard links."""
+    dst = tmp_path / "copied_module.py"
+    with unittest.mock.patch("os.link", side_effect=OSError("hard links not supported")):
+        _link_or_copy(sample_module_path, dst)
+    
+    with open(sample_module_path) as f:
+        assert dst.read_text() == f.read()
+    assert not os.path.samefile(sample_module_path, dst)
+
+
+@pytest.fixture(scope="session")
+def hook_root(tmp_path_factory, instrumentation_cache_dir):
+    """Install one import hook for the session, watching a shared root directory."""
+    root = str(tmp_path_factory.mktemp("watch_root"))
+    finder = import_hook.initialize_hook(root, cache_dir=instrumentation_cache_dir)
+    yield root
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
+
+
 @pytest.fixture
-def watch_dir():
-    """Create a temporary directory to watch."""
-    with tempfile.TemporaryDirectory() as tempdir:
+def watch_dir(hook_root):
+    """Create a temporary directory to watch, under the hooked root directory."""
+    with tempfile.TemporaryDirectory(dir=hook_root) as tempdir:
         yield tempdir
 
 
-def test_initialize_hook(watch_dir):
+def test_initialize_hook(watch_dir, instrumentation_cache_dir):
     """Test initializing the import hook."""
     # Mock sys.meta_path to avoid affecting the real import system
     with unittest.mock.patch("sys.meta_path", []):
-        finder = import_hook.initialize_hook(watch_dir)
+        finder = import_hook.initialize_hook(watch_dir, cache_dir=instrumentation_cache_dir)
         
         # Check that the finder was installed
         assert finder in sys.meta_path
         assert isinstance(finder, import_hook.InstrumentationFinder)
 
 
+def test_instrumented_calls_emit_events(sample_module_path, watch_dir, instrumentation_cache_dir):
+    """Test that executing instrumented code emits call events, without the import machinery."""
+    watch_path = os.path.join(watch_dir, "linked_module.py")
+    with open(sample_module_path, "r") as f:
+        source_code = f.read()
+    
+    instrumenter = import_hook.PythonInstrumenter(watch_dir, cache_dir=instrumentation_cache_dir)
+    instrumented_code = instrumenter.instrument_code(source_code, "linked_module", watch_path)
+    
+    # Execute the instrumented code into a fresh module
+    module = types.ModuleType("linked_module")
+    module.__file__ = watch_path
+    
+    import_hook.clear_call_queue()
+    exec(compile(instrumented_code, watch_path, "exec"), module.__dict__)
+    
+    # Call functions to trigger events
+    module.hello_world()
+    module.calculate_sum(1, 2)
+    module.Person("Test").greet()
+    
+    function_names = [event.function_name for event in import_hook.get_function_calls()]
+    
+    # Function names include their nesting level, so compare the last component
+    tails = {name.rsplit('.', 1)[-1] for name in function_names}
+    assert 'hello_world' in tails
+    assert 'calculate_sum' in tails
+    assert '__init__' in tails
+    assert 'greet' in tails
+
+
+@pytest.mark.slow
 def test_dynamic_instrumentation(sample_module_path, watch_dir):
     """Test dynamic instrumentation by loading a module through the hook."""
-    # Create a symbolic link to the sample module in the watch directory
-    watch_path = os.path.join(watch_dir, "linked_module.py")
-    with open(sample_module_path, "r") as src, open(watch_path, "w") as dst:
-        dst.write(src.read())
+    # Link the shared sample module into the watch directory, under a unique
+    # module name so the import cannot collide with another test's module
+    module_name = f"linked_module_{uuid.uuid4().hex}"
+    watch_path = os.path.join(watch_dir, f"{module_name}.py")
+    _link_or_copy(sample_module_path, watch_path)
     
     # Add the watch directory to sys.path
     sys.path.insert(0, watch_dir)
     
-    # Clear any previous imports
-    if "linked_module" in sys.modules:
-        del sys.modules["linked_module"]
-    
     try:
         # Clear the call queue
         import_hook.clear_call_queue()
         
-        # Initialize the hook
-        import_hook.initialize_hook(watch_dir)
-        
         # Import the module (this should trigger instrumentation)
-        linked_module = importlib.import_module("linked_module")
+        linked_module = importlib.import_module(module_name)
         
         # Call functions to trigger events
         linked_module.hello_world()
@@ -265,11 +314,12 @@ def test_dynamic_instrumentation(sample_module_path, watch_dir):
         function_names = [event.function_name for event in events]
         
         # With our new implementation, function names include their nesting level
-        # So we check if the function names end with the expected names
-        assert any(name.endswith('.hello_world') or name == 'hello_world' for name in function_names)
-        assert any(name.endswith('.calculate_sum') or name == 'calculate_sum' for name in function_names)
-        assert any(name.endswith('.__init__') or name == '__init__' for name in function_names)
-        assert any(name.endswith('.greet') or name == 'greet' for name in function_names)
+        # So we check the last component of each function name
+        tails = {name.rsplit('.', 1)[-1] for name in function_names}
+        assert 'hello_world' in tails
+        assert 'calculate_sum' in tails
+        assert '__init__' in tails
+        assert 'greet' in tails
         
         # Check that the file is being monitored
         monitored_files = import_hook.get_monitored_files()
@@ -280,15 +330,8 @@ def test_dynamic_instrumentation(sample_module_path, watch_dir):
         if watch_dir in sys.path:
             sys.path.remove(watch_dir)
         
-        # Remove the finder from sys.meta_path
-        sys.meta_path = [
-            finder for finder in sys.meta_path 
-            if not isinstance(finder, import_hook.InstrumentationFinder)
-        ]
-        
         # Remove the module from sys.modules
-        if "linked_module" in sys.modules:
-            del sys.modules["linked_module"]
+        sys.modules.pop(module_name, None)
 
 
 def test_get_function_calls():
@@ -312,6 +355,20 @@ def test_get_function_calls():
     assert any(event.function_name == "func2" for event in events)
 
 
+def test_drain_call_queue():
+    """Test draining all function call events from the queue at once."""
+    import_hook.clear_call_queue()
+    
+    events = [import_hook.FunctionCallEvent(f"func{i}", "module", "file.py") for i in range(100)]
+    for event in events:
+        import_hook.function_call_queue.put(event)
+    
+    # Events come back in the order they were queued and the queue is left empty
+    assert import_hook.drain_call_queue() == events
+    assert import_hook.function_call_queue.empty()
+    assert import_hook.drain_call_queue() == []
+
+
 def test_clear_call_queue():
     """Test clearing the function call queue."""
     # Add some events
@@ -377,29 +434,24 @@ class TestClass:
     ])
 
 
+@pytest.mark.slow
 def test_dynamic_instrumentation_with_advanced_patterns(advanced_module_path, watch_dir):
     """Test dynamic instrumentation with advanced code patterns."""
-    # Create a symbolic link to the sample module in the watch directory
-    watch_path = os.path.join(watch_dir, "advanced_module.py")
-    with open(advanced_module_path, "r") as src, open(watch_path, "w") as dst:
-        dst.write(src.read())
+    # Link the shared sample module into the watch directory, under a unique
+    # module name so the import cannot collide with another test's module
+    module_name = f"advanced_module_{uuid.uuid4().hex}"
+    watch_path = os.path.join(watch_dir, f"{module_name}.py")
+    _link_or_copy(advanced_module_path, watch_path)
     
     # Add the watch directory to sys.path
     sys.path.insert(0, watch_dir)
     
-    # Clear any previous imports
-    if "advanced_module" in sys.modules:
-        del sys.modules["advanced_module"]
-    
     try:
         # Clear the call queue
         import_hook.clear_call_queue()
         
-        # Initialize the hook
-        import_hook.initialize_hook(watch_dir)
-        
         # Import the module (this should trigger instrumentation)
-        advanced_module = importlib.import_module("advanced_module")
+        advanced_module = importlib.import_module(module_name)
         
         # Call functions to trigger events
         advanced_module.outer_function(5)
@@ -417,16 +469,19 @@ def test_dynamic_instrumentation_with_advanced_patterns(advanced_module_path, wa
         # Collect function names that were called
         function_names = [event.function_name for event in events]
         
-        # Check for various expected functions - with the updated naming pattern
-        assert any(name.endswith('.outer_function') or name == 'outer_function' for name in function_names)
-        assert any('inner_function' in name for name in function_names)
-        assert any(name.endswith('.create_multiplier') or name == 'create_multiplier' for name in function_names)
-        assert any('multiplier' in name for name in function_names)
-        assert any(name.endswith('.__init__') or name == '__init__' for name in function_names)
-        assert any(name.endswith('.description') or name == 'description' for name in function_names)
-        assert any(name.endswith('.full_description') or name == 'full_description' for name in function_names)
-        assert any(name.endswith('.honk') or name == 'honk' for name in function_names)
-        assert any(name.endswith('.apply_operation') or name == 'apply_operation' for name in function_names)
+        # Check for various expected functions - with the updated naming pattern,
+        # matching either the last name component or a substring of any name
+        tails = {name.rsplit('.', 1)[-1] for name in function_names}
+        joined_names = "\0".join(function_names)
+        assert 'outer_function' in tails
+        assert 'inner_function' in joined_names
+        assert 'create_multiplier' in tails
+        assert 'multiplier' in joined_names
+        assert '__init__' in tails
+        assert 'description' in tails
+        assert 'full_description' in tails
+        assert 'honk' in tails
+        assert 'apply_operation' in tails
         
         # Check that the file is being monitored
         monitored_files = import_hook.get_monitored_files()
@@ -437,15 +492,8 @@ def test_dynamic_instrumentation_with_advanced_patterns(advanced_module_path, wa
         if watch_dir in sys.path:
             sys.path.remove(watch_dir)
         
-        # Remove the finder from sys.meta_path
-        sys.meta_path = [
-            finder for finder in sys.meta_path 
-            if not isinstance(finder, import_hook.InstrumentationFinder)
-        ]
-        
         # Remove the module from sys.modules
-        if "advanced_module" in sys.modules:
-            del sys.modules["advanced_module"]
+        sys.modules.pop(module_name, None)
 
 
 if __name__ == "__main__":
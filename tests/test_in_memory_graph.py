@@ -297,6 +297,30 @@ class TestInMemoryGraphStorage(unittest.TestCase):
         }
         self.assertEqual(edge_tuples, expected_tuples)
     
+    def test_get_directional_edges(self):
+        """Test getting only the outgoing or incoming edges of a node."""
+        parse_result = {
+            'nodes': [
+                {'id': 'func1', 'type': 'function', 'name': 'func1'},
+                {'id': 'func2', 'type': 'function', 'name': 'func2'},
+                {'id': 'func3', 'type': 'function', 'name': 'func3'}
+            ],
+            'edges': [
+                {'source': 'func1', 'target': 'func2', 'type': 'calls'},
+                {'source': 'func3', 'target': 'func1', 'type': 'calls'}
+            ]
+        }
+        self.graph_storage.add_or_update_file('test_file.py', parse_result)
+        
+        out_edges = self.graph_storage.get_out_edges('func1')
+        self.assertEqual([(e['source'], e['target'], e['type']) for e in out_edges], [('func1', 'func2', 'calls')])
+        
+        in_edges = self.graph_storage.get_in_edges('func1')
+        self.assertEqual([(e['source'], e['target'], e['type']) for e in in_edges], [('func3', 'func1', 'calls')])
+        
+        self.assertEqual(self.graph_storage.get_out_edges('missing'), [])
+        self.assertEqual(self.graph_storage.get_in_edges('missing'), [])
+    
     def test_handle_empty_parse_result(self):
         """Test handling an empty parse result."""
         filepath = 'empty_file.py'
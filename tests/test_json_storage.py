@@ -3,17 +3,15 @@ Tests for the JSON graph storage module.
 """
 
 import os
-import sys
 import json
 import tempfile
 import unittest
 import shutil
-from pathlib import Path
+import io
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from graph_core.storage.json_storage import JSONGraphStorage
+from graph_core.storage.json_storage import (
+    JSONGraphStorage, HASH_CHUNK_SIZE, calculate_content_hash, calculate_file_hash
+)
 
 
 class TestJSONGraphStorage(unittest.TestCase):
@@ -455,5 +453,239 @@ class TestJSONGraphStorage(unittest.TestCase):
         self.assertIn("function:func3", node_ids)
 
 
+    def test_logged_updates_replayed_on_load(self):
+        """Test that updates written to the delta log survive a reload without a full save."""
+        parse_result = {
+            'nodes': [
+                {'id': 'function:caller', 'type': 'function', 'name': 'caller'},
+                {'id': 'function:callee', 'type': 'function', 'name': 'callee'}
+            ],
+            'edges': []
+        }
+        self.storage.add_or_update_file("test.py", parse_result)
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            base_content = f.read()
+        
+        # Disable compaction so the updates stay in the log
+        self.storage.LOG_COMPACTION_RATIO = float('inf')
+        self.storage.graph.nodes['function:callee']['dynamic_call_count'] = 3
+        self.storage.log_node_update('function:callee')
+        self.storage.graph.add_edge('function:caller', 'function:callee', key='calls', dynamic=True)
+        self.storage.log_edge_update('function:caller', 'function:callee', 'calls')
+        
+        # The base file is untouched, the updates are in the log
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), base_content)
+        with open(f"{self.json_path}.log", 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        
+        reloaded = JSONGraphStorage(self.json_path)
+        self.assertEqual(reloaded.get_node('function:callee')['dynamic_call_count'], 3)
+        self.assertTrue(reloaded.graph.edges['function:caller', 'function:callee', 'calls']['dynamic'])
+    
+    def test_log_compaction(self):
+        """Test that the delta log is folded into the JSON file once it grows too large."""
+        parse_result = {
+            'nodes': [
+                {'id': 'function:test_func', 'type': 'function', 'name': 'test_func'}
+            ],
+            'edges': []
+        }
+        self.storage.add_or_update_file("test.py", parse_result)
+        log_path = f"{self.json_path}.log"
+        
+        for count in range(1, 20):
+            self.storage.graph.nodes['function:test_func']['dynamic_call_count'] = count
+            self.storage.log_node_update('function:test_func')
+        
+        # The log must have been compacted at least once and can never outgrow the threshold
+        log_size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        self.assertLessEqual(log_size, JSONGraphStorage.LOG_COMPACTION_RATIO * os.path.getsize(self.json_path))
+        
+        # An explicit compaction removes the log and writes the latest state to the JSON file
+        self.storage.compact()
+        self.assertFalse(os.path.exists(log_path))
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        node_in_file = next(n for n in data['nodes'] if n['id'] == 'function:test_func')
+        self.assertEqual(node_in_file['dynamic_call_count'], 19)
+
+    def test_batched_saves_once(self):
+        """Test that saves requested inside batched() are written once on exit."""
+        parse_result1 = {
+            'nodes': [{'id': 'function:func1', 'type': 'function', 'name': 'func1'}],
+            'edges': []
+        }
+        parse_result2 = {
+            'nodes': [{'id': 'function:func2', 'type': 'function', 'name': 'func2'}],
+            'edges': []
+        }
+        
+        with self.storage.batched():
+            self.storage.add_or_update_file("file1.py", parse_result1)
+            with self.storage.batched():
+                self.storage.add_or_update_file("file2.py", parse_result2)
+            # Nothing is written until the outermost block exits
+            self.assertFalse(os.path.exists(self.json_path))
+        
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual({n['id'] for n in data['nodes']}, {'function:func1', 'function:func2'})
+        
+        # A batch without changes doesn't write anything
+        mtime = os.path.getmtime(self.json_path)
+        os.utime(self.json_path, (mtime - 10, mtime - 10))
+        with self.storage.batched():
+            pass
+        self.assertEqual(os.path.getmtime(self.json_path), mtime - 10)
+
+    def test_async_writes(self):
+        """Test that a background-writer storage persists changes once flushed."""
+        storage = JSONGraphStorage(self.json_path, async_writes=True)
+        try:
+            for i in range(5):
+                storage.add_or_update_file(f"file{i}.py", {
+                    'nodes': [{'id': f'function:func{i}', 'type': 'function', 'name': f'func{i}'}],
+                    'edges': []
+                })
+            storage.flush()
+            
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.assertEqual(len(data['nodes']), 5)
+            self.assertEqual(len(data['file_nodes']), 5)
+        finally:
+            storage.close()
+        self.assertIsNone(storage._writer_thread)
+
+    def test_async_write_retried_after_failure(self):
+        """Test that the background writer re-queues a write that failed instead of dropping it."""
+        storage = JSONGraphStorage(self.json_path, async_writes=True)
+        storage.WRITE_RETRY_DELAY = 0.01
+        real_write_graph = storage._write_graph
+        attempts = []
+
+        def flaky_write_graph(snapshot=False):
+            attempts.append(snapshot)
+            if len(attempts) == 1:
+                # The kind of error raised when the graph is changed mid-serialization
+                raise RuntimeError("dictionary changed size during iteration")
+            return real_write_graph(snapshot=snapshot)
+
+        storage._write_graph = flaky_write_graph
+        try:
+            storage.add_or_update_file("file.py", {
+                'nodes': [{'id': 'function:func', 'type': 'function', 'name': 'func'}],
+                'edges': []
+            })
+            storage.flush()
+        finally:
+            storage.close()
+
+        self.assertGreaterEqual(len(attempts), 2)
+        self.assertTrue(all(attempts))
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual([n['id'] for n in data['nodes']], ['function:func'])
+
+    def test_load_graph_shares_repeated_strings(self):
+        """Test that repeated secret warning values are shared after loading."""
+        warning = {'secretType': 'api_key', 'lineNumber': 1, 'snippet': 'key = ***', 'confidence': 'high'}
+        sample_data = {
+            'nodes': [
+                {'id': 'module:a.py', 'type': 'module', 'secretWarnings': [dict(warning)]},
+                {'id': 'module:b.py', 'type': 'module', 'secretWarnings': [dict(warning, lineNumber=7)]}
+            ],
+            'edges': [],
+            'file_nodes': {}
+        }
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(sample_data, f)
+        
+        storage = JSONGraphStorage(self.json_path)
+        warning_a = storage.get_node('module:a.py')['secretWarnings'][0]
+        warning_b = storage.get_node('module:b.py')['secretWarnings'][0]
+        self.assertEqual(warning_b['lineNumber'], 7)
+        self.assertIs(warning_a['secretType'], warning_b['secretType'])
+        self.assertIs(warning_a['confidence'], warning_b['confidence'])
+
+    def test_load_truncated_graph_file(self):
+        """Test that a truncated graph file is treated as invalid rather than partially loaded."""
+        self.storage.add_or_update_file("test.py", {
+            'nodes': [{'id': 'function:test_func', 'type': 'function', 'name': 'test_func'}],
+            'edges': []
+        })
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:-1])
+        
+        storage = JSONGraphStorage(self.json_path)
+        self.assertEqual(storage.get_node_count(), 0)
+        self.assertEqual(storage.file_nodes, {})
+
+    def test_batched_log_updates_coalesced(self):
+        """Test that repeated log updates inside batched() produce one record per element."""
+        self.storage.add_or_update_file("test.py", {
+            'nodes': [{'id': 'function:test_func', 'type': 'function', 'name': 'test_func'}],
+            'edges': []
+        })
+        self.storage.LOG_COMPACTION_RATIO = float('inf')
+        
+        with self.storage.batched():
+            for count in range(1, 101):
+                self.storage.graph.nodes['function:test_func']['dynamic_call_count'] = count
+                self.storage.log_node_update('function:test_func')
+        
+        with open(f"{self.json_path}.log", 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['attrs']['dynamic_call_count'], 100)
+
+    def test_logged_file_rename_replayed_on_load(self):
+        """Test that a file rename written to the delta log is applied on reload."""
+        self.storage.add_or_update_file("old.py", {
+            'nodes': [{'id': 'function:test_func', 'type': 'function', 'name': 'test_func'}],
+            'edges': []
+        })
+        self.storage.LOG_COMPACTION_RATIO = float('inf')
+        
+        self.storage.file_nodes['new.py'] = self.storage.file_nodes.pop('old.py')
+        self.storage.graph.nodes['function:test_func']['rename_history'] = ['old.py']
+        with self.storage.batched():
+            self.storage.log_file_rename('old.py', 'new.py')
+            self.storage.log_node_update('function:test_func')
+        
+        reloaded = JSONGraphStorage(self.json_path)
+        self.assertEqual(reloaded.file_nodes, {'new.py': {'function:test_func'}})
+        self.assertEqual(reloaded.get_node('function:test_func')['rename_history'], ['old.py'])
+
+    def test_calculate_file_hash_chunked(self):
+        """Test that hashing a reader without readinto() reads in bounded chunks and matches hashing the whole content."""
+        content = bytes(4 * 1024 * 1024)
+        read_sizes = []
+        
+        class RecordingReader:
+            def __init__(self, data):
+                self._buffer = io.BytesIO(data)
+            
+            def read(self, size=-1):
+                read_sizes.append(size)
+                return self._buffer.read(size)
+        
+        self.assertEqual(calculate_file_hash(RecordingReader(content)), calculate_content_hash(content))
+        self.assertTrue(read_sizes)
+        self.assertTrue(all(0 < size <= HASH_CHUNK_SIZE for size in read_sizes))
+    
+    def test_calculate_file_hash_unbuffered_file(self):
+        """Test that hashing an unbuffered file matches hashing its whole content."""
+        content = os.urandom(300 * 1024)
+        path = os.path.join(self.temp_dir, "blob.bin")
+        with open(path, 'wb') as f:
+            f.write(content)
+        
+        with open(path, 'rb', buffering=0) as f:
+            self.assertEqual(calculate_file_hash(f), calculate_content_hash(content))
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
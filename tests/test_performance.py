@@ -8,10 +8,6 @@ import tempfile
 import unittest
 import subprocess
 import shutil
-from pathlib import Path
-
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Assuming profiler.py is in performance/ directory
 PROFILER_SCRIPT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "performance", "profiler.py"))
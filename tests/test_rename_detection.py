@@ -3,16 +3,11 @@ Tests for the rename detection module.
 """
 
 import os
-import sys
 import tempfile
 import pytest
 import shutil
-from pathlib import Path
 from typing import List, Set, Tuple
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from graph_core.watchers.rename_detection import (
     detect_renames,
     RenameEvent,
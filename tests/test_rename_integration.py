@@ -3,18 +3,13 @@ Integration tests for rename detection with file watcher.
 """
 
 import os
-import sys
 import time
 import shutil
 import tempfile
 import threading
 import pytest
-from pathlib import Path
 from typing import List, Set, Dict, Any, Callable
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from graph_core.watchers.file_watcher import start_file_watcher
 from graph_core.watchers.rename_detection import detect_renames, RenameEvent
 
@@ -2,13 +2,8 @@
 Tests for the TreeSitterParser class.
 """
 import os
-import sys
 import pytest
 from unittest.mock import MagicMock, patch, ANY
-from pathlib import Path
-
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Import the module directly to mock its dependencies
 import graph_core.analyzer.treesitter_parser.tree_sitter_parser as parser_module
@@ -36,7 +36,7 @@ from mcp.types import (
 from graph_core.storage.in_memory import InMemoryGraphStorage
 from graph_core.storage.json_storage import JSONGraphStorage
 from graph_core.manager import DependencyGraphManager, DEFAULT_JSON_PATH
-from graph_core.watchers.file_watcher import start_file_watcher
+from graph_core.watchers.file_watcher import start_bulk_file_watcher
 
 # Set up logging
 logging.basicConfig(
@@ -471,9 +471,10 @@ def start_watcher(manager: DependencyGraphManager, watch_dir: str) -> None:
                     manager.on_file_event('created', filepath)
         
         # Start watching for changes
-        start_file_watcher(
-            callback=manager.on_file_event,
-            watch_dir=watch_dir
+        start_bulk_file_watcher(
+            callback=manager.on_file_events_bulk,
+            watch_dir=watch_dir,
+            suffixes=supported_extensions
         )
     except Exception as e:
         logger.exception(f"Error in file watcher: {str(e)}")